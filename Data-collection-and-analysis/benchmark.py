@@ -0,0 +1,206 @@
+"""
+End-to-end benchmark of the pipeline on a synthetic discography. It times each
+stage against local stand-ins:
+
+- collect: main.py against stub_server.py (Spotify and Genius).
+- clean: cleaning.py and similarity.py's near-duplicate drop.
+- score: emotion_scoring.py with FakeBackend.
+- storage_write and storage_read: storage.py.
+- aggregates: the dashboard's cached loaders.
+
+Results are written as JSON so runs can be compared.
+
+    python benchmark.py --artists 2 --albums 3 --tracks 12 --out bench.json
+    python benchmark.py --artists 2 --albums 3 --tracks 12 --compare bench.json
+
+With --compare, stages slower than the old run by more than --tolerance are listed,
+and the exit status is 1.
+"""
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from stub_server import build_catalog, start_in_background
+
+DASHBOARD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Streamlit-dashboard", "dashboard.py")
+
+
+def timed(stages, name, items, func, *args, **kwargs):
+    """Runs func with its output silenced, records its timing in `stages` and returns its result."""
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start_time
+    stages[name] = {"seconds": round(elapsed, 4), "items": items,
+                    "items_per_second": round(items / elapsed, 1) if elapsed else None}
+    print(f"{name:<14} {elapsed:8.3f}s  {items:>7} items  {stages[name]['items_per_second'] or 0:>10,.1f}/s")
+    return result
+
+
+def collect(catalog, base_url, output_dir, workers):
+    """Collects every artist in `catalog` with main.py pointed at the stub server; returns the records."""
+    os.environ.update(SPOTIFY_ACCOUNTS_URL=base_url, SPOTIFY_API_URL=f"{base_url}/v1",
+                      GENIUS_BASE_URL=base_url, GENIUS_API_TOKEN="stub", CLIENT_ID="stub", CLIENT_SECRET="stub")
+    import main # Reads the endpoints above at import time
+    from cache import ResponseCache
+    from manifest import read_jsonl
+
+    main.response_cache = ResponseCache(path=None) # Measure the network path, not the cache
+    main.metrics.enable()
+    records = []
+    for i, discography in enumerate(catalog):
+        artist = main.search_for_artist(discography["artist"])
+        artist_dir = os.path.join(output_dir, f"artist{i + 1}")
+        main.collect_discography(artist, artist_dir, workers=workers)
+        for path in sorted(glob.glob(os.path.join(artist_dir, "*.jsonl"))):
+            records.extend(read_jsonl(path))
+    return pd.DataFrame(records)
+
+
+def clean(songs):
+    from cleaning import clean_series, drop_missing_lyrics
+    from similarity import drop_near_duplicates
+
+    songs = drop_missing_lyrics(songs)
+    songs['lyrics'] = clean_series(songs['lyrics'])
+    return drop_near_duplicates(songs)
+
+
+def score(songs, workers, latency):
+    from emotion_scoring import FakeBackend, add_emotion_scores, score_songs
+
+    scores = score_songs(songs, FakeBackend(latency=latency), workers=workers, rate=0)
+    return add_emotion_scores(songs, scores)
+
+
+def load_dashboard(data_path):
+    """Imports dashboard.py as a module (its page only renders under `streamlit run`)."""
+    os.environ["DASHBOARD_DATA"] = data_path
+    from streamlit import logger
+
+    logger.set_log_level("error") # Hides the "no runtime" warnings of running outside `streamlit run`
+    sys.path.insert(0, os.path.dirname(DASHBOARD_PATH))
+    spec = importlib.util.spec_from_file_location("dashboard", DASHBOARD_PATH)
+    dashboard = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dashboard)
+    return dashboard
+
+
+def aggregates(dashboard, data_path):
+    """Builds every artist's album cube and emotion index, as the dashboard does on first view."""
+    version = time.time_ns() # A fresh version so nothing comes from an earlier call's cache
+    albums_by_artist = dashboard.load_catalog(data_path, version)
+    for artist in albums_by_artist:
+        dashboard.load_album_stats(data_path, version, artist)
+        dashboard.load_emotion_index(data_path, version, artist)
+    return albums_by_artist
+
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "pandas": pd.__version__, "numpy": np.__version__, "pyarrow": pa.__version__}
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="mm-bench-")
+    catalog = build_catalog(args.artists, args.albums, args.tracks, seed=args.seed)
+    total_tracks = args.artists * args.albums * args.tracks
+    stages = {}
+    print(f"Synthetic catalog: {args.artists} artists x {args.albums} albums x {args.tracks} tracks "
+          f"= {total_tracks} tracks (work dir {workdir})")
+    server, base_url = start_in_background(discography=catalog, latency=args.latency)
+    try:
+        songs = timed(stages, "collect", total_tracks, collect, catalog, base_url,
+                      os.path.join(workdir, "raw"), args.workers)
+    finally:
+        server.shutdown()
+
+    import main
+
+    stages["collect"]["breakdown"] = main.metrics.report()["timers"]
+
+    songs = timed(stages, "clean", len(songs), clean, songs)
+    scored = timed(stages, "score", len(songs), score, songs, args.score_workers, args.score_latency)
+
+    from storage import read_scores, write_dataset
+
+    data_path = os.path.join(workdir, "dataset")
+    timed(stages, "storage_write", len(scored), write_dataset, scored, data_path)
+    timed(stages, "storage_read", len(scored), read_scores, data_path)
+
+    dashboard = load_dashboard(data_path)
+    timed(stages, "aggregates", len(scored), aggregates, dashboard, data_path)
+
+    if args.keep:
+        print(f"Kept {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("out", "compare", "tolerance", "keep")}
+    return {"config": config, "environment": environment(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stages": stages}
+
+
+def compare(result, baseline, tolerance):
+    """Prints each stage's time against `baseline` and returns the stages slower by more than `tolerance`."""
+    if result["config"] != baseline.get("config"):
+        print("Warning: the runs used different settings, so timings are not directly comparable.")
+    regressions = []
+    print(f"\n{'stage':<14} {'before':>9} {'after':>9} {'change':>8}")
+    for name, stage in result["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before["seconds"]:
+            continue
+        change = stage["seconds"] / before["seconds"] - 1
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"{name:<14} {before['seconds']:8.3f}s {stage['seconds']:8.3f}s {change:+8.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the collection-to-dashboard pipeline on synthetic data.")
+    parser.add_argument("--artists", type=int, default=2)
+    parser.add_argument("--albums", type=int, default=3)
+    parser.add_argument("--tracks", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=8, help="Collector threads.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub server adds to every response.")
+    parser.add_argument("--score-workers", type=int, default=4)
+    parser.add_argument("--score-latency", type=float, default=0.0, help="Seconds FakeBackend sleeps per song.")
+    parser.add_argument("--out", default="benchmark.json", help="Where to write the JSON results.")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Slowdown (0.25 = 25%%) above which a stage counts as a regression.")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory with the generated files.")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    result = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Wrote {args.out}")
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"Slower than {args.compare}: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Cache hits whose last_access update is held back before being written in one transaction
+TOUCH_BATCH = 256
+
+
+class ResponseCache:
+    """
+    On-disk cache for API responses and lyrics, stored in a single SQLite file.
+    Entries are content-addressed by a hash of their key parts (endpoint + params,
+    or artist + track title), expire after `ttl` seconds, and the least recently
+    used ones are evicted once the cache grows past `max_bytes`.
+
+    The total size is kept in memory, so a write only scans the table when it pushes
+    the cache over `max_bytes`. Hits record their access time in memory and are
+    written every TOUCH_BATCH hits and on close().
+
+    With `path=None` the cache is disabled: every lookup is a miss and nothing is stored.
+    """
+
+    def __init__(self, path=".cache/collector.sqlite", ttl=7 * 24 * 3600,
+                 max_bytes=512 * 1024 * 1024, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._total = 0
+        self._touched = {} # key -> last access time not yet written
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Opened on first use so importing main.py never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+            self._conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def make_key(*parts):
+        """Hashes the key parts (any JSON-serializable values) into a cache key."""
+        canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, *parts):
+        """Returns the cached value for `parts`, or None on a miss or expired entry."""
+        if self.path is None:
+            self.misses += 1
+            return None
+        key = self.make_key(*parts)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches(conn)
+                conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, value, *parts, ttl=None):
+        """Stores `value` (JSON-serializable) under `parts`, evicting down to `max_bytes` if it is exceeded."""
+        if self.path is None:
+            return
+        key = self.make_key(*parts)
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        size = len(payload.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            replaced = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                         (key, payload, size, expires_at, now))
+            self._touched.pop(key, None)
+            self._total += size - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _flush_touches(self, conn):
+        conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                         [(accessed, key) for key, accessed in self._touched.items()])
+        self._touched.clear()
+
+    def _evict(self, conn, now):
+        # Expired entries go first, then the least recently used until the cache fits
+        self._flush_touches(conn)
+        expired = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE expires_at < ?", (now,)).fetchone()[0]
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        self._total -= expired
+        if self._total <= self.max_bytes:
+            return
+        while self._total > self.max_bytes:
+            # A few rows at a time off the LRU index, so a full cache doesn't read every key per write
+            oldest = conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 32").fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    break
+
+    def stats(self):
+        """Returns the hit/miss counters for this run."""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                if self._touched:
+                    self._flush_touches(self._conn)
+                    self._conn.commit()
+                self._conn.close()
+                self._conn = None
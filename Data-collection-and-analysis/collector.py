@@ -0,0 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def collect_albums(albums, fetch_tracks, build_record, workers=8):
+    """
+    Fans the per-album track listing and per-track lyrics work out over a bounded
+    thread pool. `fetch_tracks(album)` returns an album's tracks and
+    `build_record(album, track)` returns one JSONL record. Records come back in
+    album/track order, so the output is the same as the serial loop's.
+    With one worker everything runs in the calling thread, where profilers can follow it.
+    """
+    if workers <= 1:
+        track_lists = [fetch_tracks(album) for album in albums]
+        return [build_record(album, track) for album, tracks in zip(albums, track_lists) for track in tracks]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        track_lists = list(pool.map(fetch_tracks, albums))
+
+        jobs = [(album, track) for album, tracks in zip(albums, track_lists) for track in tracks]
+        return list(pool.map(lambda job: build_record(*job), jobs))
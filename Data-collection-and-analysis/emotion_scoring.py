@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from rate_limit import RateLimiter
+
+EMOTION_SET = [
+    "Joy", "Hopefulness", "Calmness / Serenity", "Nostalgia",
+    "Love / Affection", "Melancholy", "Sadness / Grief", "Resignation",
+    "Frustration", "Longing", "Anger", "Fear / Anxiety"
+]
+
+RESULT_COLUMNS = ['song_emotion_1', 'song_score_1', 'song_emotion_2', 'song_score_2',
+                  'song_emotion_3', 'song_score_3']
+
+NEUTRAL_RESULT = ("neutral", 0.0, "neutral", 0.0, "neutral", 0.0)
+API_ERROR_RESULT = ("api_error", 0.0, "api_error", 0.0, "api_error", 0.0)
+
+#JSON schema to force a structured output
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "emotion_1": {"type": "STRING", "enum": EMOTION_SET},
+        "score_1": {"type": "NUMBER"},
+        "emotion_2": {"type": "STRING", "enum": EMOTION_SET},
+        "score_2": {"type": "NUMBER"},
+        "emotion_3": {"type": "STRING", "enum": EMOTION_SET},
+        "score_3": {"type": "NUMBER"}
+    },
+    "required": ["emotion_1", "score_1", "emotion_2", "score_2", "emotion_3", "score_3"]
+}
+
+SAFETY_SETTINGS = {
+    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
+    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
+    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
+    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
+}
+
+PROMPT_TEMPLATE = """
+You are analyzing a song in Mac miller's album '{album}' for deep emotional content. Do NOT focus on surface-level positive words or bravado. Instead, analyze the underlying psychological and emotional state.
+
+Focus only on these emotions:
+
+- Joy → feelings of happiness, playfulness, or light-hearted energy.
+- Hopefulness → optimism about the future, anticipation of something better.
+- Calmness / Serenity → peacefulness, acceptance, or a sense of inner stillness.
+- Nostalgia → longing for the past, bittersweet remembrance.
+- Love / Affection → intimacy, tenderness, warmth toward self or others.
+- Melancholy → reflective, lingering sorrow or wistfulness, not acute sadness.
+- Sadness / Grief → acute emotional pain tied to loss or absence.
+- Resignation → acceptance of struggle, limitation, or inevitability.
+- Frustration → dissatisfaction, feeling stuck, blocked or hindered, tension.
+- Longing → yearning for something unattainable, missing, or distant.
+- Anger → irritation, resentment, or hostility.
+- Fear / Anxiety → worry, dread, unease, or apprehension about uncertainty.
+
+**Instructions:**
+- Use the emotion definitions above to guide your choices.
+- ANALYZE THESE LYRICS FOR THE TOP 3 EMOTIONS from this allowed list: {emotions}.
+- Provide a confidence score for each emotion from 0.0 to 1.0.
+
+Lyrics:
+"{lyrics}"
+"""
+
+
+def build_prompt(lyrics, album):
+    return PROMPT_TEMPLATE.format(album=album, emotions=', '.join(EMOTION_SET), lyrics=lyrics)
+
+
+def prompt_version():
+    """Short hash of the prompt template and emotion set; changing either changes the version."""
+    fingerprint = json.dumps([PROMPT_TEMPLATE, EMOTION_SET, RESPONSE_SCHEMA], sort_keys=True)
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+
+def lyrics_hash(lyrics):
+    return hashlib.sha256((lyrics if isinstance(lyrics, str) else "").encode("utf-8")).hexdigest()
+
+
+class EmotionBackend:
+    """
+    Interface for emotion scorers. A backend turns one song's lyrics into the
+    (emotion_1, score_1, emotion_2, score_2, emotion_3, score_3) tuple; batching,
+    rate limiting, retries and checkpointing are handled by score_songs.
+    """
+    name = "backend"
+
+    def score(self, lyrics, album):
+        raise NotImplementedError
+
+
+class GeminiBackend(EmotionBackend):
+    """Scores songs with Gemini. The model is configured once and shared by every request."""
+
+    def __init__(self, api_key=None, model_name="gemini-1.5-flash"):
+        import google.generativeai as genai # Only needed when scoring with Gemini
+
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self.name = model_name
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": RESPONSE_SCHEMA
+            },
+            safety_settings=SAFETY_SETTINGS
+        )
+
+    def score(self, lyrics, album):
+        response = self.model.generate_content(build_prompt(lyrics, album))
+        response_data = json.loads(response.text)
+        return (
+            response_data.get("emotion_1", "error"),
+            response_data.get("score_1", 0.0),
+            response_data.get("emotion_2", "error"),
+            response_data.get("score_2", 0.0),
+            response_data.get("emotion_3", "error"),
+            response_data.get("score_3", 0.0)
+        )
+
+
+class FakeBackend(EmotionBackend):
+    """
+    Offline backend that derives scores from a hash of the lyrics, so the same song
+    always gets the same result. Used to exercise the pipeline without API calls.
+    """
+    name = "fake"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def score(self, lyrics, album):
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha256(lyrics.encode("utf-8")).digest()
+        picks = []
+        for byte in digest:
+            emotion = EMOTION_SET[byte % len(EMOTION_SET)]
+            if emotion not in picks:
+                picks.append(emotion)
+            if len(picks) == 3:
+                break
+        scores = sorted((round(0.5 + digest[-i] / 510, 2) for i in range(1, 4)), reverse=True)
+        return picks[0], scores[0], picks[1], scores[1], picks[2], scores[2]
+
+
+def _load_checkpoint(path, model):
+    """
+    (album, track_title) -> (lyrics hash, result) for the checkpoint lines written with
+    the current prompt version and `model`. Lines from other prompts or models, and
+    older lines without those fields, are ignored. A run killed mid-write leaves a
+    partial last line; it is cut off, so that song is scored again and the next
+    result starts on a line of its own.
+    """
+    done = {}
+    version = prompt_version()
+    if not path or not os.path.exists(path):
+        return done
+    complete = 0  # bytes up to the end of the last line that parsed
+    newline_missing = False
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                entry = json.loads(line) if line.strip() else None
+            except json.JSONDecodeError:
+                if line.endswith(b'\n'):
+                    complete += len(line)  # damaged line in the middle: skip it
+                    continue
+                break
+            complete += len(line)
+            newline_missing = not line.endswith(b'\n')
+            if entry is None or entry.get('prompt_version') != version or entry.get('model') != model:
+                continue
+            done[(entry['album'], entry['track_title'])] = (entry['lyrics_hash'], tuple(entry['result']))
+    if complete < os.path.getsize(path):
+        print(f"Dropping a partial last line from checkpoint {path}.")
+        os.truncate(path, complete)
+    elif newline_missing:
+        with open(path, 'ab') as f:
+            f.write(b'\n')
+    return done
+
+
+def score_songs(songs, backend, workers=4, rate=1.0, checkpoint=None, retries=4, store=None):
+    """
+    Scores every unique (album, track_title, lyrics) row of `songs` with `backend`.
+
+    Requests run on `workers` threads, at most `rate` per second (0 = unlimited).
+    Each finished song is appended to the `checkpoint` JSONL file with its lyrics hash,
+    prompt version and model, so re-running after a crash only scores the songs that are
+    missing; a song whose lyrics, prompt or model changed is scored again. With a score_store.ScoreStore as
+    `store`, songs whose lyrics, album, prompt and model were scored before are
+    answered from it without calling the backend. Returns a DataFrame with album,
+    track_title and the song_emotion_N/song_score_N columns; throughput is in
+    `result.attrs['songs_per_second']`.
+    """
+    unique_songs = songs[['album', 'track_title', 'lyrics']].drop_duplicates(['album', 'track_title'])
+    unique_songs = unique_songs.reset_index(drop=True)
+    checkpointed = _load_checkpoint(checkpoint, backend.name)
+    results = {}
+    todo = []
+    for row in unique_songs.itertuples(index=False):
+        key = (row.album, row.track_title)
+        if key in checkpointed and checkpointed[key][0] == lyrics_hash(row.lyrics):
+            results[key] = checkpointed[key][1]
+            continue
+        memoized = store.get(row.lyrics, row.album, backend.name) if store and isinstance(row.lyrics, str) else None
+        if memoized is not None:
+            results[key] = memoized
+        else:
+            todo.append(row)
+    resumed = len(results)
+    memoized_count = len(unique_songs) - resumed - len(todo)
+
+    rate_limiter = RateLimiter(rate)
+    write_lock = threading.Lock()
+    checkpoint_file = open(checkpoint, 'a', encoding='utf-8') if checkpoint else None
+
+    def score_one(song):
+        if not isinstance(song.lyrics, str) or len(song.lyrics.split()) < 3:
+            result = NEUTRAL_RESULT
+        else:
+            result = API_ERROR_RESULT
+            for attempt in range(retries):
+                try:
+                    rate_limiter.wait(backend.name)
+                    result = tuple(backend.score(song.lyrics, song.album))
+                    break
+                except Exception as e:
+                    if attempt == retries - 1:
+                        print(f"API call failed after multiple retries for lyrics: '{song.lyrics[:50]}...'. Error: {e}")
+                        break
+                    wait_time = 2 ** attempt
+                    print(f"An error occurred: {e}. Retrying in {wait_time} second(s)...")
+                    time.sleep(wait_time)
+
+        if store and result not in (API_ERROR_RESULT, NEUTRAL_RESULT):
+            store.put(song.lyrics, song.album, backend.name, song.track_title, result)
+
+        # Errors aren't checkpointed, so a resumed run tries those songs again
+        if checkpoint_file and result != API_ERROR_RESULT:
+            line = json.dumps({'album': song.album, 'track_title': song.track_title,
+                               'lyrics_hash': lyrics_hash(song.lyrics), 'prompt_version': prompt_version(),
+                               'model': backend.name, 'result': result}, ensure_ascii=False)
+            with write_lock:
+                checkpoint_file.write(line + '\n')
+                checkpoint_file.flush()
+        return (song.album, song.track_title), result
+
+    print(f"Analyzing {len(todo)} unique songs with {backend.name} "
+          f"({resumed} already in checkpoint, {memoized_count} from the score store)...")
+    start_time = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results.update(pool.map(score_one, todo))
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+    elapsed = time.perf_counter() - start_time
+    songs_per_second = len(todo) / elapsed if elapsed else 0.0
+    print(f"Scored {len(todo)} songs in {elapsed:.1f}s ({songs_per_second:.2f} songs/second).")
+
+    scores = pd.DataFrame([results[(album, title)]
+                           for album, title in zip(unique_songs['album'], unique_songs['track_title'])],
+                          columns=RESULT_COLUMNS)
+    scored = pd.concat([unique_songs[['album', 'track_title']], scores], axis=1)
+    scored.attrs['songs_per_second'] = songs_per_second
+    return scored
+
+
+def add_emotion_scores(df, scores):
+    """Merges score_songs output back onto the per-track DataFrame."""
+    return pd.merge(df, scores, on=['album', 'track_title'], how='left')
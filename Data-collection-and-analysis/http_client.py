@@ -0,0 +1,134 @@
+import base64
+import contextlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _RateLimitedRetry(Retry):
+    """Retry that also waits for the rate limiter before each retry, so retries are spaced and counted too."""
+    rate_limiter = None
+    url = None
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.rate_limiter, retry.url = self.rate_limiter, self.url
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response=response, error=error, _pool=_pool, _stacktrace=_stacktrace)
+        if _pool is not None:
+            retry.url = f"{_pool.scheme}://{_pool.host}"
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(self.url)
+
+
+class _RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that waits for its rate limiter before every request it sends."""
+
+    def __init__(self, rate_limiter=None, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(request.url)
+        return super().send(request, **kwargs)
+
+
+def make_adapter(pool_size=32, retries=4, backoff=0.5, rate_limiter=None):
+    """
+    Returns an HTTPAdapter whose keep-alive connection pool fits `pool_size`
+    concurrent workers. Failed requests (429/5xx, dropped connections) are retried
+    with exponential backoff, waiting as long as the server's Retry-After asks.
+    With a rate_limit.RateLimiter, every request and every retry waits for its
+    host's turn and is counted.
+    """
+    retry = _RateLimitedRetry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                              allowed_methods=None, respect_retry_after_header=True, raise_on_status=False)
+    retry.rate_limiter = rate_limiter
+    return _RateLimitedAdapter(rate_limiter, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+
+def mount_adapter(session, **adapter_options):
+    """
+    Mounts a make_adapter() adapter on an existing session for http and https,
+    keeping the session's own headers (e.g. a library's User-Agent). Returns the session.
+    """
+    adapter = make_adapter(**adapter_options)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def make_session(**adapter_options):
+    """Returns a new requests.Session with a make_adapter() adapter mounted."""
+    return mount_adapter(requests.Session(), **adapter_options)
+
+
+class SpotifyClient:
+    """
+    Spotify Web API client with a pooled session and a client-credentials token
+    that is reused until shortly before it expires and then refreshed transparently.
+    Without a `session`, the client's own one waits for `rate_limiter` on every request.
+    With a `metrics` registry (metrics.Metrics), token fetches and API calls are timed.
+    """
+
+    def __init__(self, client_id, client_secret, accounts_url, api_url,
+                 rate_limiter=None, session=None, refresh_margin=60, timeout=15, metrics=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.accounts_url = accounts_url
+        self.api_url = api_url
+        self.session = session or make_session(rate_limiter=rate_limiter)
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.metrics = metrics
+        self.token_refreshes = 0
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _timer(self, name):
+        return self.metrics.timer(name) if self.metrics is not None else contextlib.nullcontext()
+
+    def token(self, force_refresh=False):
+        """Returns a valid access token, fetching a new one if the current one is about to expire."""
+        with self._lock:
+            if force_refresh or self._token is None or time.monotonic() >= self._expires_at:
+                auth_string = f"{self.client_id}:{self.client_secret}"
+                auth_base64 = str(base64.b64encode(auth_string.encode("utf-8")), "utf-8")
+                url = f"{self.accounts_url}/api/token"
+
+                with self._timer("spotify_token"):
+                    result = self.session.post(url, headers={"Authorization": "Basic " + auth_base64},
+                                               data={"grant_type": "client_credentials"}, timeout=self.timeout)
+                    result.raise_for_status()
+                token_info = result.json()
+                self._token = token_info["access_token"]
+                self._expires_at = time.monotonic() + token_info.get("expires_in", 3600) - self.refresh_margin
+                self.token_refreshes += 1
+            return self._token
+
+    def get(self, url, params=None):
+        """GETs a Spotify endpoint and returns its JSON body, re-authenticating once on a 401."""
+        for force_refresh in (False, True):
+            token = self.token(force_refresh=force_refresh)
+            with self._timer("spotify_request"):
+                result = self.session.get(url, headers={"Authorization": f"Bearer {token}"},
+                                          params=params, timeout=self.timeout)
+            if result.status_code != 401:
+                break
+            if self.metrics is not None:
+                self.metrics.count("spotify_reauthentications")
+        result.raise_for_status()
+        return result.json()
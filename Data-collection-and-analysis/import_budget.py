@@ -0,0 +1,100 @@
+"""
+Import-time budget for the two entry points. Each one is imported in a fresh
+interpreter under `python -X importtime`; the check fails (exit status 1) if the
+import takes longer than its budget, or if it loads a module that should wait until
+it is first used: lyricsgenius, langdetect and pandas for the collector, pandas,
+pyarrow and plotly.express for the dashboard, whose title should paint before
+any data library loads.
+
+    python import_budget.py
+    python import_budget.py --scale 2   # on a slower machine
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_DIR = os.path.join(HERE, "..", "Streamlit-dashboard")
+
+# Seconds for the import itself, measured as the best of --repeat cold interpreters.
+# Streamlit alone takes about half a second to import.
+ENTRY_POINTS = {
+    "collector": {"directory": HERE, "module": "main", "budget": 0.4,
+                  "deferred": ["lyricsgenius", "langdetect", "pandas", "numpy", "pyarrow"]},
+    "dashboard": {"directory": DASHBOARD_DIR, "module": "dashboard", "budget": 1.0,
+                  "deferred": ["pandas", "numpy", "pyarrow", "plotly.express"]},
+}
+
+
+def import_times(directory, module):
+    """
+    Imports `module` from `directory` in a new interpreter and returns
+    [(depth, name, cumulative seconds)] for every module it loaded, in import order.
+    """
+    # Run from the repo root, as `streamlit run Streamlit-dashboard/dashboard.py` is
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(directory), PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=os.path.join(HERE, ".."), env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        error = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"import {module} failed:\n{error}")
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((depth, name.strip(), int(cumulative) / 1e6))
+    return modules
+
+
+def check(name, entry, repeat, scale):
+    """Prints the entry point's import time and heaviest imports; returns a list of problems."""
+    best = None
+    for _ in range(repeat):
+        modules = import_times(entry["directory"], entry["module"])
+        position = next(i for i, (depth, module, _) in enumerate(modules)
+                        if module == entry["module"] and depth == 0)
+        total = modules[position][2]
+        if best is None or total < best[0]:
+            best = (total, modules, position)
+    total, modules, position = best
+    budget = entry["budget"] * scale
+
+    print(f"{name:<10} import {entry['module']:<10} {total:6.3f}s  (budget {budget:.2f}s)")
+    # importtime lists a module after everything it imported; its direct imports are one level deeper
+    children = []
+    for depth, module, seconds in reversed(modules[:position]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((seconds, module))
+    heaviest = sorted(children)[-5:]
+    for seconds, module in reversed(heaviest):
+        print(f"    {module:<30} {seconds:6.3f}s")
+
+    problems = []
+    if total > budget:
+        problems.append(f"{name}: importing {entry['module']} took {total:.3f}s, over its {budget:.2f}s budget")
+    loaded = {module for _, module, _ in modules}
+    for deferred in entry["deferred"]:
+        if deferred in loaded:
+            problems.append(f"{name}: importing {entry['module']} loaded {deferred}, which should load on first use")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the collector and dashboard import within their time budgets.")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per entry point; the fastest counts.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this.")
+    args = parser.parse_args()
+
+    problems = []
+    for name, entry in ENTRY_POINTS.items():
+        problems += check(name, entry, args.repeat, args.scale)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("All entry points import within budget.")
@@ -0,0 +1,172 @@
+"""
+Language identification for lyrics, shared by the collector (main.py).
+
+langdetect.detect builds a detector from an unseeded global factory and reads up
+to 10,000 characters of every song, so the same lyrics can come back as 'en' on
+one run and 'pl' on the next. detect_languages loads the profiles into one seeded
+factory per process, reads a bounded window from the middle of each song (past the
+intro ad-libs, without [Section] tags), caches answers by a hash of the lyrics and
+spreads big batches over a process pool. The same lyrics always get the same answer.
+
+    python language.py --benchmark 2000
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from langdetect import LangDetectException
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+
+from cleaning import SECTION_TAG_PATTERN
+
+UNKNOWN = "unknown"
+SEED = 0
+
+# Characters of each song the detector reads; a few lines are plenty to tell languages apart
+WINDOW_CHARS = 600
+# Songs with fewer words than this (including the collector's error messages) are "unknown"
+MIN_WORDS = 5
+
+# Below this many songs to detect, starting worker processes (each loading the
+# profiles) costs more than it saves
+PARALLEL_THRESHOLD = 5000
+CACHE_SIZE = 100000
+
+_factory = None
+_factory_lock = threading.Lock()
+_cache = {} # sha1 of the lyrics -> language, oldest first
+_cache_lock = threading.Lock()
+
+
+def _get_factory():
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            factory = DetectorFactory()
+            factory.load_profile(PROFILES_DIRECTORY)
+            factory.set_seed(SEED)
+            _factory = factory
+    return _factory
+
+
+def lyrics_window(text, size=WINDOW_CHARS):
+    """Returns up to `size` characters from the middle of the lyrics, cut at word boundaries."""
+    text = " ".join(SECTION_TAG_PATTERN.sub(" ", text).split())
+    if len(text) <= size:
+        return text
+    start = text.rfind(" ", 0, (len(text) - size) // 2 + 1) + 1
+    end = text.rfind(" ", start, start + size + 1)
+    return text[start:end] if end > start else text[start:start + size]
+
+
+def _detect_window(window):
+    try:
+        detector = _get_factory().create()
+        detector.append(window)
+        return detector.detect()
+    except LangDetectException:
+        return UNKNOWN
+
+
+def _detect_chunk(windows):
+    return [_detect_window(window) for window in windows]
+
+
+def _lyrics_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def detect_languages(texts, workers=None, chunksize=500):
+    """
+    Returns the language code of each text, in order: 'en', 'fr', ... or 'unknown' for
+    empty, very short or undetectable texts. Texts seen before are answered from the
+    cache; the rest run on `workers` processes (default: all CPUs) once there are
+    PARALLEL_THRESHOLD of them, and in-process otherwise.
+    """
+    languages = [UNKNOWN] * len(texts)
+    pending = {} # hash -> (window, positions of the texts with that hash)
+    with _cache_lock:
+        for i, text in enumerate(texts):
+            if not isinstance(text, str) or len(text.split()) < MIN_WORDS:
+                continue
+            digest = _lyrics_hash(text)
+            if digest in _cache:
+                languages[i] = _cache[digest]
+            elif digest in pending:
+                pending[digest][1].append(i)
+            else:
+                pending[digest] = (lyrics_window(text), [i])
+
+    windows = [window for window, _ in pending.values()]
+    if workers == 1 or (workers is None and len(windows) < PARALLEL_THRESHOLD):
+        detected = _detect_chunk(windows)
+    else:
+        chunks = [windows[i:i + chunksize] for i in range(0, len(windows), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            detected = [language for chunk in pool.map(_detect_chunk, chunks) for language in chunk]
+
+    with _cache_lock:
+        for (digest, (_, positions)), language in zip(pending.items(), detected):
+            for i in positions:
+                languages[i] = language
+            _cache[digest] = language
+        while len(_cache) > CACHE_SIZE:
+            del _cache[next(iter(_cache))]
+    return languages
+
+
+def detect_language(text):
+    """Detects the language of one text; see detect_languages."""
+    return detect_languages([text], workers=1)[0]
+
+
+def _langdetect_per_song(texts):
+    """The collector's original per-song langdetect.detect on the full text, kept as the benchmark baseline."""
+    from langdetect import detect
+
+    languages = []
+    for text in texts:
+        try:
+            languages.append(detect(text) if text and len(text.split()) >= MIN_WORDS else UNKNOWN)
+        except LangDetectException:
+            languages.append(UNKNOWN)
+    return languages
+
+
+def benchmark(songs):
+    from cleaning import synthetic_corpus
+
+    corpus = synthetic_corpus(songs).tolist()
+    _get_factory() # Both sides start with the profiles loaded
+    _langdetect_per_song(corpus[:1])
+    print(f"Synthetic corpus: {songs} songs, {os.cpu_count()} CPUs")
+
+    results = {}
+    for name, detect in [("per-song detect", _langdetect_per_song),
+                         ("batch, 1 process", lambda texts: detect_languages(texts, workers=1)),
+                         ("batch, all CPUs", lambda texts: detect_languages(texts, workers=os.cpu_count())),
+                         ("batch, cached", lambda texts: detect_languages(texts, workers=1))]:
+        if name == "batch, 1 process" or name == "batch, all CPUs":
+            _cache.clear()
+        start_time = time.perf_counter()
+        results[name] = detect(corpus)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:<18} {elapsed:7.2f}s  {songs / elapsed:10,.0f} songs/s")
+
+    batch = results["batch, 1 process"]
+    if results["batch, all CPUs"] != batch or results["batch, cached"] != batch:
+        raise AssertionError("batch detection gave different answers for the same lyrics")
+    agreement = sum(a == b for a, b in zip(results["per-song detect"], batch)) / songs
+    print(f"Agreement with per-song detect: {agreement:.1%}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark lyrics language detection on a synthetic corpus.")
+    parser.add_argument("--benchmark", type=int, default=2000, metavar="SONGS",
+                        help="Number of synthetic songs to detect.")
+    args = parser.parse_args()
+    benchmark(args.benchmark)
@@ -0,0 +1,158 @@
+"""
+CPU-only emotion scorer that needs no network access. It learns one TF-IDF centroid
+per emotion from the Gemini labels in Analysed_data.csv and scores every song at
+once with NumPy, producing the same song_emotion_N/song_score_N columns.
+
+    python local_scorer.py Swimming.jsonl Circles.jsonl Balloonerism.jsonl --out local_scores.csv
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from cleaning import SECTION_TAG_PATTERN
+from emotion_scoring import EMOTION_SET, RESULT_COLUMNS
+
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+DEFAULT_TRAINING_DATA = "../Streamlit-dashboard/Analysed_data.csv"
+
+
+def tokenize(lyrics):
+    if not isinstance(lyrics, str):
+        return []
+    return TOKEN_PATTERN.findall(SECTION_TAG_PATTERN.sub(" ", lyrics.lower()))
+
+
+class LocalEmotionScorer:
+    """Nearest-centroid classifier over sublinear TF-IDF features."""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.idf = None
+        self.centroids = None # (len(EMOTION_SET), vocabulary size)
+        self.top_score = 1.0
+
+    def _term_weights(self, lyrics):
+        """
+        Returns the corpus as COO arrays (doc index, term index, L2-normalized TF-IDF
+        weight), keeping only terms in the vocabulary.
+        """
+        doc_ids, term_ids = [], []
+        for doc, text in enumerate(lyrics):
+            ids = [self.vocabulary[token] for token in tokenize(text) if token in self.vocabulary]
+            doc_ids.extend([doc] * len(ids))
+            term_ids.extend(ids)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+
+        # Count each (doc, term) pair once, then weight by 1 + log(tf) and idf
+        pairs, counts = np.unique(doc_ids * len(self.vocabulary) + term_ids, return_counts=True)
+        docs, terms = np.divmod(pairs, len(self.vocabulary))
+        weights = (1 + np.log(counts)) * self.idf[terms]
+        norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=len(lyrics)))
+        weights /= norms[docs]
+        return docs, terms, weights
+
+    def fit(self, labelled):
+        """Learns centroids from a DataFrame with lyrics and song_emotion_N/song_score_N columns."""
+        lyrics = labelled['lyrics'].tolist()
+        tokens_per_song = [set(tokenize(text)) for text in lyrics]
+        self.vocabulary = {token: i for i, token in enumerate(sorted(set().union(*tokens_per_song)))}
+        document_frequency = np.zeros(len(self.vocabulary))
+        for tokens in tokens_per_song:
+            document_frequency[[self.vocabulary[t] for t in tokens]] += 1
+        self.idf = np.log((1 + len(lyrics)) / (1 + document_frequency)) + 1
+
+        # Label matrix: each song's Gemini score for each of its top 3 emotions
+        labels = np.zeros((len(lyrics), len(EMOTION_SET)))
+        emotion_index = {emotion: i for i, emotion in enumerate(EMOTION_SET)}
+        for n in (1, 2, 3):
+            emotions = labelled[f'song_emotion_{n}'].map(emotion_index)
+            known = emotions.notna().to_numpy()
+            labels[np.flatnonzero(known), emotions[known].astype(int)] = labelled[f'song_score_{n}'].to_numpy()[known]
+
+        docs, terms, weights = self._term_weights(lyrics)
+        self.centroids = np.vstack([np.bincount(terms, weights=weights * labels[docs, e], minlength=len(self.vocabulary))
+                                    for e in range(len(EMOTION_SET))])
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        self.centroids /= np.where(norms > 0, norms, 1)
+        self.top_score = float(labelled['song_score_1'].mean())
+        return self
+
+    def similarities(self, lyrics):
+        """Cosine similarity of every song to every emotion centroid, shape (songs, emotions)."""
+        docs, terms, weights = self._term_weights(list(lyrics))
+        return np.column_stack([np.bincount(docs, weights=weights * self.centroids[e, terms], minlength=len(lyrics))
+                                for e in range(len(EMOTION_SET))])
+
+    def predict(self, lyrics):
+        """
+        Returns a DataFrame of RESULT_COLUMNS for `lyrics`. Scores are similarities
+        rescaled so each song's top emotion gets the mean top score of the training
+        labels, keeping them on the same 0-1 scale as the Gemini output.
+        """
+        sims = self.similarities(lyrics)
+        top3 = np.argsort(-sims, axis=1)[:, :3]
+        top_sims = np.take_along_axis(sims, top3, axis=1)
+        row_max = np.where(top_sims[:, :1] > 0, top_sims[:, :1], 1)
+        scores = np.round(top_sims / row_max * self.top_score, 2)
+
+        emotions = np.asarray(EMOTION_SET, dtype=object)[top3]
+        no_signal = top_sims[:, 0] <= 0 # No known words at all
+        emotions[no_signal] = "neutral"
+        columns = {}
+        for n in range(3):
+            columns[f'song_emotion_{n + 1}'] = emotions[:, n]
+            columns[f'song_score_{n + 1}'] = scores[:, n]
+        return pd.DataFrame(columns, columns=RESULT_COLUMNS)
+
+    def score_songs(self, songs):
+        """Scores a DataFrame like emotion_scoring.score_songs does, returning album, track_title and scores."""
+        unique_songs = songs[['album', 'track_title', 'lyrics']].drop_duplicates(['album', 'track_title'])
+        unique_songs = unique_songs.reset_index(drop=True)
+        return pd.concat([unique_songs[['album', 'track_title']], self.predict(unique_songs['lyrics'])], axis=1)
+
+    def save(self, path):
+        np.savez_compressed(path, vocabulary=np.asarray(list(self.vocabulary)), idf=self.idf,
+                            centroids=self.centroids, top_score=self.top_score)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        scorer = cls()
+        scorer.vocabulary = {token: i for i, token in enumerate(data['vocabulary'].tolist())}
+        scorer.idf = data['idf']
+        scorer.centroids = data['centroids']
+        scorer.top_score = float(data['top_score'])
+        return scorer
+
+
+def low_confidence(scored, margin=0.05):
+    """
+    Songs whose top two local emotions are within `margin` of each other, or that
+    got no signal at all: the candidates worth sending to the LLM.
+    """
+    close = (scored['song_score_1'] - scored['song_score_2']) < margin
+    return scored[close | (scored['song_emotion_1'] == "neutral")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score lyrics locally with a TF-IDF emotion model.")
+    parser.add_argument("inputs", nargs="+", help="JSONL lyrics files from main.py.")
+    parser.add_argument("--train", default=DEFAULT_TRAINING_DATA, help="CSV with Gemini labels to learn from.")
+    parser.add_argument("--out", default="local_scores.csv", help="Where to write the scores.")
+    parser.add_argument("--margin", type=float, default=0.05,
+                        help="Top-2 score gap below which a song is listed for LLM review.")
+    args = parser.parse_args()
+
+    scorer = LocalEmotionScorer().fit(pd.read_csv(args.train))
+    songs = pd.concat([pd.read_json(path, lines=True) for path in args.inputs], ignore_index=True)
+
+    start_time = time.perf_counter()
+    scored = scorer.score_songs(songs)
+    elapsed = time.perf_counter() - start_time
+    scored.to_csv(args.out, index=False)
+    print(f"Scored {len(scored)} songs in {elapsed:.3f}s; wrote {args.out}.")
+    print(f"{len(low_confidence(scored, args.margin))} songs are close calls worth checking with the LLM.")
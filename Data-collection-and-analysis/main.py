@@ -1,12 +1,19 @@
 import os
+import glob
 import time
-import base64
 import json
-import re
+import argparse
+import threading
 from dotenv import load_dotenv
-from requests import get, post, HTTPError
-import lyricsgenius
-from langdetect import detect, LangDetectException
+from requests import HTTPError
+from rate_limit import RateLimiter
+from http_client import SpotifyClient, mount_adapter
+from cache import ResponseCache
+from manifest import Manifest
+from collector import collect_albums
+from metrics import Metrics, profiled
+# lyricsgenius, language (langdetect), cleaning (pandas) and search_index (numpy) are
+# imported where they are first used, so `--help` and importing the helpers stay fast
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -18,155 +25,331 @@ SPOTIFY_CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 # Genius Credentials
 GENIUS_API_TOKEN = os.getenv("GENIUS_API_TOKEN")
 
-# Initialize the Genius API client with a longer timeout
-genius = lyricsgenius.Genius(GENIUS_API_TOKEN, 
-                             remove_section_headers=False, # Keep [Chorus], etc.
-                             skip_non_songs=True, 
-                             excluded_terms=["(Remix)", "(Live)"],
-                             verbose=False,
-                             timeout=15) # Increased timeout for slow pages
-
-def get_spotify_token():
-    """Obtains an access token from the Spotify API."""
-    auth_string = f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}"
-    auth_bytes = auth_string.encode("utf-8")
-    auth_base64 = str(base64.b64encode(auth_bytes), "utf-8")
-    url = "https://accounts.spotify.com/api/token"
-    headers = {"Authorization": "Basic " + auth_base64}
-    data = {"grant_type": "client_credentials"}
-    
-    try:
-        result = post(url, headers=headers, data=data)
-        result.raise_for_status()
-        return result.json().get("access_token")
-    except HTTPError as http_err:
-        print(f"Spotify HTTP error (token): {http_err}")
-    return None
+# API endpoints, overridable so the collector can be pointed at stub_server.py
+SPOTIFY_ACCOUNTS_URL = os.getenv("SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com")
+SPOTIFY_API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1")
+GENIUS_BASE_URL = os.getenv("GENIUS_BASE_URL")
+
+# The Genius client is built on the first lyrics lookup, so runs served from the
+# cache (and imports of this module) need neither lyricsgenius nor a token
+genius = None
+_genius_lock = threading.Lock()
+
+def get_genius():
+    """Returns the shared Genius API client, creating it on first use."""
+    global genius
+    with _genius_lock:
+        if genius is None:
+            import lyricsgenius
+
+            client = lyricsgenius.Genius(GENIUS_API_TOKEN, 
+                                         remove_section_headers=False, # Keep [Chorus], etc.
+                                         skip_non_songs=True, 
+                                         excluded_terms=["(Remix)", "(Live)"],
+                                         verbose=False,
+                                         timeout=15) # Increased timeout for slow pages
+            # Pooled keep-alive connections, retries honour Retry-After; lyricsgenius' headers are kept
+            mount_adapter(client._session, rate_limiter=rate_limiter)
+            if GENIUS_BASE_URL:
+                client.API_ROOT = client.WEB_ROOT = GENIUS_BASE_URL.rstrip("/") + "/"
+                client.PUBLIC_API_ROOT = client.API_ROOT + "api/"
+            genius = client
+    return genius
+
+# Shared by every helper below; the CLI sets the per-host rate, cache and metrics options
+rate_limiter = RateLimiter()
+response_cache = ResponseCache()
+metrics = Metrics()
+spotify = SpotifyClient(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, SPOTIFY_ACCOUNTS_URL, SPOTIFY_API_URL,
+                        rate_limiter=rate_limiter, metrics=metrics)
+
+LYRICS_ERROR = "Error fetching lyrics after multiple attempts."
+
+def spotify_get(url, params, fresh=False):
+    """
+    GETs a Spotify endpoint, serving the JSON body from the response cache when possible.
+    The client only fetches a token on a cache miss, so warm runs never authenticate.
+    With `fresh`, the cache is only read when offline; the response is still cached for --offline runs.
+    """
+    cached = response_cache.get("GET", url, params) if response_cache.offline or not fresh else None
+    if cached is not None:
+        metrics.count("spotify_cache_hits")
+        return cached
+    metrics.count("spotify_cache_misses")
+    if response_cache.offline:
+        print(f"Offline: no cached response for {url} {params}")
+        return {}
+
+    data = spotify.get(url, params)
+    response_cache.set(data, "GET", url, params)
+    return data
 
-def search_for_artist(token, artist_name):
+def spotify_get_all(url, params, fresh=False):
+    """Follows Spotify's limit/offset paging and returns the items from every page."""
+    items = []
+    params = dict(params, offset=0)
+    while True:
+        page = spotify_get(url, params, fresh=fresh)
+        items.extend(page.get("items", []))
+        if not page.get("next"):
+            return items
+        params = dict(params, offset=params["offset"] + params["limit"])
+
+@metrics.timed("spotify_search")
+def search_for_artist(artist_name):
     """Searches for an artist on Spotify to get their ID."""
-    url = "https://api.spotify.com/v1/search"
-    headers = {"Authorization": f"Bearer {token}"}
+    url = f"{SPOTIFY_API_URL}/search"
     params = {"q": artist_name, "type": "artist", "limit": 1}
 
     try:
-        result = get(url, headers=headers, params=params)
-        result.raise_for_status()
-        artists = result.json().get("artists", {}).get("items", [])
+        artists = spotify_get(url, params).get("artists", {}).get("items", [])
         return artists[0] if artists else None
     except HTTPError as http_err:
         print(f"Spotify HTTP error (artist search): {http_err}")
     return None
 
-def get_artist_albums(token, artist_id):
-    """Gets all official albums for a given artist from Spotify."""
-    url = f"https://api.spotify.com/v1/artists/{artist_id}/albums"
-    headers = {"Authorization": f"Bearer {token}"}
+@metrics.timed("spotify_albums")
+def get_artist_albums(artist_id, fresh=False):
+    """Gets all official albums for a given artist from Spotify (bypassing the cache if `fresh`)."""
+    url = f"{SPOTIFY_API_URL}/artists/{artist_id}/albums"
     params = {"include_groups": "album", "limit": 50}
     
     try:
-        result = get(url, headers=headers, params=params)
-        result.raise_for_status()
-        return result.json().get("items", [])
+        return spotify_get_all(url, params, fresh=fresh)
     except HTTPError as http_err:
         print(f"Spotify HTTP error (albums): {http_err}")
     return []
 
-def get_album_tracks(token, album_id):
-    """Gets all tracks for a given album from Spotify."""
-    url = f"https://api.spotify.com/v1/albums/{album_id}/tracks"
-    headers = {"Authorization": f"Bearer {token}"}
+@metrics.timed("spotify_tracks")
+def get_album_tracks(album_id, fresh=False):
+    """Gets all tracks for a given album from Spotify (bypassing the cache if `fresh`)."""
+    url = f"{SPOTIFY_API_URL}/albums/{album_id}/tracks"
     params = {"limit": 50}
     
     try:
-        result = get(url, headers=headers, params=params)
-        result.raise_for_status()
-        return result.json().get("items", [])
+        return spotify_get_all(url, params, fresh=fresh)
     except HTTPError as http_err:
         print(f"Spotify HTTP error (tracks): {http_err}")
     return []
 
 def get_lyrics(artist_name, track_title):
+    """Returns the lyrics for a track, from the response cache when possible."""
+    cached = response_cache.get("lyrics", artist_name, track_title)
+    if cached is not None:
+        metrics.count("lyrics_cache_hits")
+        return cached
+    metrics.count("lyrics_cache_misses")
+    if response_cache.offline:
+        print(f"  -> Offline: no cached lyrics for '{track_title}'")
+        return "Lyrics not found."
+
+    lyrics = fetch_lyrics(artist_name, track_title)
+    if lyrics != LYRICS_ERROR: # Don't cache failures, so the next run retries them
+        response_cache.set(lyrics, "lyrics", artist_name, track_title)
+    return lyrics
+
+@metrics.timed("genius_lyrics")
+def fetch_lyrics(artist_name, track_title):
     """
     Fetches lyrics using the lyricsgenius library and performs initial cleaning.
-    Includes a retry mechanism for robustness.
+    Transient failures (429s, 5xx, dropped connections) are retried with backoff
+    by the Genius session itself.
     """
-    for attempt in range(2): # Try up to 2 times
-        try:
-            song = genius.search_song(track_title, artist_name)
-            if song and song.lyrics:
-                raw_lyrics = song.lyrics
-                #remove metadata
-                start_pos = raw_lyrics.find('[')
-                
-                if start_pos != -1:
-                    # If a bracket is found, take everything from that point onward
-                    lyrics_body = raw_lyrics[start_pos:]
-                    return lyrics_body.strip()
-                else:
-                    # If no brackets are found, it might be a poem or malformed.
-                    # remove the common "Lyrics" header.
-                    lyrics_body = re.sub(r'^.*Lyrics', '', raw_lyrics, flags=re.IGNORECASE | re.DOTALL).strip()
-                    return lyrics_body
-            
-            return "Lyrics not found."
-        except Exception as e:
-            print(f"  -> Attempt {attempt + 1} failed for '{track_title}': {e}")
-            time.sleep(1) # Wait a second before retrying
-    
-    return "Error fetching lyrics after multiple attempts."
-
+    from cleaning import strip_genius_header
 
-def detect_language(text):
-    """Detects the language of a given text."""
     try:
-        if not text or len(text.split()) < 5: # Check for very short/empty strings
-            return "unknown"
-        return detect(text)
-    except LangDetectException:
-        return "unknown"
+        genius = get_genius()
+        song = genius.search_song(track_title, artist_name)
+        if song and song.lyrics:
+            metrics.count("lyrics_found")
+            # remove metadata
+            return strip_genius_header(song.lyrics)
+        
+        metrics.count("lyrics_not_found")
+        return "Lyrics not found."
+    except Exception as e:
+        metrics.count("lyrics_errors")
+        print(f"  -> Failed to fetch lyrics for '{track_title}': {e}")
+
+    return LYRICS_ERROR
+
+
+@metrics.timed("detect_language")
+def add_languages(records):
+    """
+    Detects the language of every record's lyrics in one batch, after the network-bound
+    track loop rather than inside it, and stores it under 'language'.
+    """
+    from language import detect_languages
+
+    languages = detect_languages([record['lyrics'] for record in records])
+    for record, language in zip(records, languages):
+        record['language'] = language
+        if language != 'en' and language != 'unknown':
+            print(f"  -> Warning: Detected language is '{language}' for track '{record['track_title']}'")
+    return records
+
+@metrics.timed("track")
+def build_track_record(artist_name, album_name, track_name):
+    """Fetches lyrics for one track and returns its JSONL record (language is added by add_languages)."""
+    print(f"Fetching data for track: {track_name}...")
+
+    lyrics = get_lyrics(artist_name, track_name)
+
+    return {
+        'artist': artist_name,
+        'album': album_name,
+        'track_title': track_name,
+        'lyrics': lyrics
+    }
+
+
+def collect_discography(artist, output_dir, workers=1):
+    """
+    Collects every album of `artist` into per-album JSONL shards in `output_dir`.
+    Tracks already recorded in the manifest are skipped, so a re-run only fetches
+    tracks that are new, changed on Spotify, or failed last time. The album and track
+    listings bypass the response cache (except offline), so the delta is computed
+    against what Spotify lists now; only lyrics are served from the cache.
+    """
+    manifest = Manifest(output_dir)
+    albums, seen_names = [], set()
+    for album in get_artist_albums(artist['id'], fresh=True):
+        if album['name'] not in seen_names: # One shard per album name, keeping the first edition listed
+            seen_names.add(album['name'])
+            albums.append(album)
+
+    album_tracks = {}
+    def fetch_pending(album):
+        tracks = get_album_tracks(album['id'], fresh=True)
+        album_tracks[album['id']] = tracks
+        pending = manifest.pending(album, tracks)
+        print(f"--- {album['name']}: {len(pending)} of {len(tracks)} tracks to fetch ---")
+        return pending
+
+    results = collect_albums(
+        albums,
+        fetch_pending,
+        lambda album, track: (album['id'], track['id'],
+                              build_track_record(artist['name'], album['name'], track['name'])),
+        workers=workers)
+
+    add_languages([record for _, _, record in results])
+    new_records = {}
+    for album_id, track_id, record in results:
+        new_records.setdefault(album_id, {})[track_id] = record
+
+    os.makedirs(output_dir, exist_ok=True)
+    for album in albums:
+        tracks = album_tracks.get(album['id'])
+        if not tracks: # Spotify error or offline miss; keep the existing shard untouched
+            continue
+        with metrics.timer("jsonl_write"):
+            count = manifest.update(album, tracks, new_records.get(album['id'], {}),
+                                    is_ok=lambda record: record['lyrics'] != LYRICS_ERROR)
+        metrics.count("tracks_written", count)
+        print(f"Wrote {count} tracks to {manifest.shard_path(album)}")
+    manifest.save()
+    return len(results)
+
+
+def update_search_index(index_dir, paths):
+    """Re-indexes the JSONL files in `paths` that changed since the index at `index_dir` last saw them."""
+    from search_index import update_index
+
+    with metrics.timer("search_index"):
+        result = update_index(index_dir, paths)
+    print(f"Search index {index_dir}: {result['indexed']} files indexed, {result['unchanged']} unchanged.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collect album lyrics from Spotify and Genius.")
+    parser.add_argument("--artist", default="Mac Miller", help="Artist to search for on Spotify.")
+    parser.add_argument("--album", default="Swimming", help="Album to collect.")
+    parser.add_argument("--all-albums", action="store_true",
+                        help="Collect the whole discography incrementally into per-album shards.")
+    parser.add_argument("--output-dir", default=".",
+                        help="Where --all-albums writes its shards and manifest.json.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of tracks fetched concurrently (1 keeps the serial behaviour).")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="Max requests per second to each host (0 = unlimited).")
+    parser.add_argument("--cache", default=".cache/collector.sqlite",
+                        help="Path of the on-disk response cache.")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache.")
+    parser.add_argument("--cache-ttl", type=float, default=7,
+                        help="Days before a cached response expires.")
+    parser.add_argument("--cache-max-mb", type=float, default=512,
+                        help="Cache size above which least recently used entries are evicted.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve everything from the cache and make no network calls.")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="Write per-stage timings and counters for this run as JSON.")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Also write them as a Prometheus text file (node_exporter textfile collector).")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Profile the run: cProfile stats, or a pyinstrument HTML report for *.html.")
+    parser.add_argument("--search-index", metavar="DIR",
+                        help="Lyrics search index to update after writing (default: lyrics_index, inside "
+                             "--output-dir with --all-albums; '' to skip).")
+    return parser.parse_args()
+
 
 # --- Main execution ---
 if __name__ == "__main__":
+    args = parse_args()
+    rate_limiter.rate = args.rate
+    if args.no_cache and args.offline:
+        raise SystemExit("--offline needs the cache; drop --no-cache.")
+    response_cache = ResponseCache(path=None if args.no_cache else args.cache,
+                                   ttl=args.cache_ttl * 24 * 3600,
+                                   max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                                   offline=args.offline)
     all_tracks_data = []
-    ARTIST_NAME_TO_SEARCH = "Mac Miller"
+    ARTIST_NAME_TO_SEARCH = args.artist
+    if args.metrics_json or args.metrics_prom:
+        metrics.enable()
+    start_time = time.perf_counter()
+    
+    with profiled(args.profile):
+        # The Spotify client authenticates lazily, so fully cached runs never request a token
+        artist = search_for_artist(ARTIST_NAME_TO_SEARCH)
     
-    spotify_token = get_spotify_token()
-    if spotify_token:
-        artist = search_for_artist(spotify_token, ARTIST_NAME_TO_SEARCH)
-        
         if artist:
             print(f"Found artist: {artist['name']} (Spotify ID: {artist['id']})")
-            albums = get_artist_albums(spotify_token, artist['id'])
-            
-            target_album_name = "Swimming"
+
+        if artist and args.all_albums:
+            fetched = collect_discography(artist, args.output_dir, workers=args.workers)
+            print(f"Fetched {fetched} new or changed tracks.")
+            if args.search_index != "":
+                update_search_index(args.search_index or os.path.join(args.output_dir, "lyrics_index"),
+                                    glob.glob(os.path.join(args.output_dir, "*.jsonl")))
+        elif artist:
+            albums = get_artist_albums(artist['id'])
+        
+            target_album_name = args.album
             target_album = next((a for a in albums if a['name'] == target_album_name), None)
 
             if target_album:
                 print(f"--- Processing Album: {target_album['name']} ---")
-                tracks = get_album_tracks(spotify_token, target_album['id'])
-                
-                if tracks:
-                    for track in tracks:
-                        track_name = track['name']
-                        print(f"Fetching data for track: {track_name}...")
-                        
-                        lyrics = get_lyrics(artist['name'], track_name)
-                        
-                        language = detect_language(lyrics)
-                        if language != 'en' and language != 'unknown':
-                            print(f"  -> Warning: Detected language is '{language}' for track '{track_name}'")
-
-                        all_tracks_data.append({
-                            'artist': artist['name'],
-                            'album': target_album['name'],
-                            'track_title': track_name,
-                            'lyrics': lyrics,
-                            'language': language
-                        })
+                all_tracks_data = collect_albums(
+                    [target_album],
+                    lambda album: get_album_tracks(album['id']),
+                    lambda album, track: build_track_record(artist['name'], album['name'], track['name']),
+                    workers=args.workers)
+                add_languages(all_tracks_data)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\nMade {rate_limiter.requests} requests in {elapsed:.1f}s "
+          f"({rate_limiter.requests / elapsed:.2f} requests/second, "
+          f"{spotify.token_refreshes} Spotify token fetches).")
+    cache_stats = response_cache.stats()
+    print(f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.0%} hit rate).")
+    response_cache.close()
     
     if all_tracks_data:
-        jsonl_file = "Swimming.jsonl"
+        jsonl_file = f"{target_album_name}.jsonl"
         
         if os.path.exists(jsonl_file):
             os.remove(jsonl_file)
@@ -174,8 +357,25 @@ if __name__ == "__main__":
 
         print(f"\nCreating new file and writing {len(all_tracks_data)} tracks to {jsonl_file}...")
         
-        with open(jsonl_file, 'w', encoding='utf-8') as f:
+        with metrics.timer("jsonl_write"), open(jsonl_file, 'w', encoding='utf-8') as f:
             for record in all_tracks_data:
                 f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        metrics.count("tracks_written", len(all_tracks_data))
+        if args.search_index != "":
+            update_search_index(args.search_index or "lyrics_index", [jsonl_file])
             
         print("Done!")
+
+    if metrics.enabled:
+        print("\nSlowest stages:")
+        for line in metrics.summary():
+            print(f"  {line}")
+        run_info = {"artist": args.artist, "album": None if args.all_albums else args.album,
+                    "workers": args.workers, "requests": rate_limiter.requests,
+                    "spotify_token_fetches": spotify.token_refreshes, "cache": cache_stats}
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json, **run_info)
+            print(f"Wrote metrics to {args.metrics_json}")
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+            print(f"Wrote Prometheus metrics to {args.metrics_prom}")
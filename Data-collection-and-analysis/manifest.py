@@ -0,0 +1,84 @@
+import json
+import os
+import re
+
+
+def write_jsonl(path, records):
+    """Writes records to a JSONL file atomically, so an interrupted run never leaves half a shard."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+
+
+def read_jsonl(path):
+    """Reads a JSONL file, returning [] if it doesn't exist yet."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def track_fingerprint(track):
+    """Summarizes the Spotify metadata that, if changed, means a track should be fetched again."""
+    return [track['name'], track.get('duration_ms'), track.get('disc_number'), track.get('track_number')]
+
+
+class Manifest:
+    """
+    Remembers which Spotify tracks have already been collected into each album's
+    JSONL shard, so a discography run only fetches tracks that are new, changed,
+    or failed last time.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, "manifest.json")
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.albums = json.load(f)["albums"]
+        else:
+            self.albums = {}
+
+    def shard_path(self, album):
+        """Returns the JSONL shard for an album, named after it like the existing Swimming.jsonl."""
+        safe_name = re.sub(r'[\\/:*?"<>|]', '_', album['name']).strip()
+        return os.path.join(self.output_dir, f"{safe_name}.jsonl")
+
+    def pending(self, album, tracks):
+        """Returns the tracks of `album` that still need to be fetched."""
+        known = self.albums.get(album['id'], {}).get("tracks", {})
+        return [track for track in tracks
+                if track['id'] not in known
+                or known[track['id']]["fingerprint"] != track_fingerprint(track)
+                or not known[track['id']]["ok"]]
+
+    def update(self, album, tracks, new_records, is_ok):
+        """
+        Merges freshly fetched records (keyed by track ID) into the album's shard,
+        drops tracks Spotify no longer lists, and records the result in the manifest.
+        """
+        shard = self.shard_path(album)
+        existing = {record['track_title']: record for record in read_jsonl(shard)}
+
+        records, entries = [], {}
+        for track in tracks:
+            record = new_records.get(track['id']) or existing.get(track['name'])
+            if record is None:
+                continue
+            records.append(record)
+            entries[track['id']] = {"title": track['name'],
+                                    "fingerprint": track_fingerprint(track),
+                                    "ok": is_ok(record)}
+
+        write_jsonl(shard, records)
+        self.albums[album['id']] = {"name": album['name'], "file": os.path.basename(shard), "tracks": entries}
+        return len(records)
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"albums": self.albums}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,194 @@
+"""
+Run metrics for the collector: counters and latency histograms for each stage
+(Spotify token and requests, Genius lookups, language detection, file writes),
+exported as a JSON report and, optionally, a Prometheus text file for the
+node_exporter textfile collector.
+
+Metrics start disabled. In that state a timed call costs one attribute check, so
+the instrumentation can stay in place on every run.
+
+    python main.py --all-albums --metrics-json run.json --metrics-prom run.prom
+    python main.py --album Swimming --profile run.pstats   # or run.html with pyinstrument
+"""
+import bisect
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+
+# Upper bounds, in seconds, of the histogram buckets (the Prometheus client defaults)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class _Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.count(f"{self.name}_errors")
+
+
+_NO_TIMER = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms for one run. Histograms keep only their
+    bucket counts, sum, min and max, so memory stays flat however many tracks are timed.
+    """
+
+    def __init__(self, enabled=False, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Starts recording; the report's duration is measured from here."""
+        self.started_at = time.time()
+        self.enabled = True
+
+    def count(self, name, value=1):
+        """Adds `value` to the counter `name`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Records one observation (a duration in seconds) in the histogram `name`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {"count": 0, "sum": 0.0, "min": value, "max": value,
+                                                     "buckets": [0] * (len(self.buckets) + 1)}
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["min"] = min(histogram["min"], value)
+            histogram["max"] = max(histogram["max"], value)
+            histogram["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+
+    def timer(self, name):
+        """Context manager timing its block into the histogram `name`; errors also count `name`_errors."""
+        return _Timer(self, name) if self.enabled else _NO_TIMER
+
+    def timed(self, name):
+        """Decorator timing every call of the function into the histogram `name`."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _quantile(self, histogram, q):
+        # Upper bound of the bucket holding the q-th observation, capped at the largest one seen
+        rank, seen = q * histogram["count"], 0
+        for bound, in_bucket in zip(self.buckets, histogram["buckets"]):
+            seen += in_bucket
+            if seen >= rank:
+                return min(bound, histogram["max"])
+        return histogram["max"]
+
+    def report(self, **info):
+        """Returns the run's metrics as a JSON-serializable dict; `info` is stored alongside them."""
+        with self._lock:
+            timers = {}
+            for name, histogram in sorted(self.histograms.items()):
+                timers[name] = {"count": histogram["count"], "total_seconds": round(histogram["sum"], 6),
+                                "mean_seconds": round(histogram["sum"] / histogram["count"], 6),
+                                "min_seconds": round(histogram["min"], 6), "max_seconds": round(histogram["max"], 6),
+                                "p50_seconds": round(self._quantile(histogram, 0.5), 6),
+                                "p95_seconds": round(self._quantile(histogram, 0.95), 6)}
+            return {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                    "duration_seconds": round(time.time() - self.started_at, 3),
+                    "info": info, "counters": dict(sorted(self.counters.items())), "timers": timers}
+
+    def prometheus(self, prefix="collector"):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"{prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, in_bucket in zip(self.buckets + ("+Inf",), histogram["buckets"]):
+                    cumulative += in_bucket
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines += [f"{metric}_sum {histogram['sum']}", f"{metric}_count {histogram['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One line per timer, slowest total first, for printing at the end of a run."""
+        timers = self.report()["timers"]
+        return [f"{name:<18} {timer['count']:>6} calls {timer['total_seconds']:9.3f}s total "
+                f"{timer['mean_seconds'] * 1000:9.1f}ms mean {timer['p95_seconds'] * 1000:9.1f}ms p95"
+                for name, timer in sorted(timers.items(), key=lambda item: -item[1]["total_seconds"])]
+
+    def write_json(self, path, **info):
+        _write_atomic(path, json.dumps(self.report(**info), indent=2))
+
+    def write_prometheus(self, path, prefix="collector"):
+        # Written to a temporary file first: the textfile collector must never read half a file
+        _write_atomic(path, self.prometheus(prefix))
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def profiled(path):
+    """
+    Profiles the block into `path`: an HTML flame report for *.html paths (needs
+    pyinstrument), otherwise cProfile stats for `python -m pstats` or snakeviz.
+    Does nothing when `path` is empty. Both profilers only follow the calling thread,
+    so profile with --workers 1, which keeps the track work in that thread.
+    """
+    if not path:
+        yield
+        return
+    if path.endswith(".html"):
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
@@ -0,0 +1,30 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """
+    Spaces out requests so no single host sees more than `rate` requests per second.
+    A rate of 0 disables throttling but still counts requests, so the collector
+    can report the throughput it achieved either way.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.requests = 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Blocks until a request to the host in `url` is allowed to go out."""
+        host = urlparse(url).hostname or url # Without the port, so retries (which only see the host) share the slot
+        with self._lock:
+            self.requests += 1
+            if not self.rate:
+                return
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
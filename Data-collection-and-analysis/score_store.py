@@ -0,0 +1,140 @@
+"""
+Memoized emotion scores, stored in SQLite. A score is reused only when the cleaned
+lyrics, the album, the prompt template, the emotion set and the model are all
+unchanged, so editing any of them invalidates the affected entries automatically.
+
+    python score_store.py inspect
+    python score_store.py prune                  # drop entries from older prompts
+    python score_store.py prune --model gemini-1.5-flash
+    python score_store.py export scores.csv
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import threading
+import time
+
+from emotion_scoring import RESULT_COLUMNS, lyrics_hash, prompt_version
+
+DEFAULT_PATH = "emotion_scores.sqlite"
+
+
+class ScoreStore:
+    """SQLite-backed memo of score_songs results."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                lyrics_hash TEXT NOT NULL,
+                album TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                track_title TEXT,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (lyrics_hash, album, prompt_version, model)
+            )""")
+
+    def get(self, lyrics, album, model, version=None):
+        """Returns the stored result tuple, or None if this exact input was never scored."""
+        key = (lyrics_hash(lyrics), album, version or prompt_version(), model)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM scores WHERE lyrics_hash = ? AND album = ? AND prompt_version = ? AND model = ?",
+                key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return tuple(json.loads(row[0]))
+
+    def put(self, lyrics, album, model, track_title, result, version=None):
+        key = (lyrics_hash(lyrics), album, version or prompt_version(), model)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               key + (track_title, json.dumps(list(result)), time.time()))
+            self._conn.commit()
+
+    def summary(self):
+        """Entry counts per (model, prompt_version), flagging which prompt version is current."""
+        current = prompt_version()
+        rows = self._conn.execute(
+            "SELECT model, prompt_version, COUNT(*), MAX(created_at) FROM scores "
+            "GROUP BY model, prompt_version ORDER BY model, prompt_version").fetchall()
+        return [{"model": model, "prompt_version": version, "entries": count,
+                 "last_scored": time.strftime("%Y-%m-%d %H:%M", time.localtime(last)),
+                 "current_prompt": version == current}
+                for model, version, count, last in rows]
+
+    def prune(self, model=None, stale_only=True, older_than_days=None):
+        """
+        Deletes entries and returns how many were removed. By default only entries
+        from an older prompt template or emotion set are removed; pass `model` to
+        restrict to one model, `stale_only=False` to include current ones, and
+        `older_than_days` to only remove old entries.
+        """
+        clauses, params = [], []
+        if stale_only:
+            clauses.append("prompt_version != ?")
+            params.append(prompt_version())
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        if older_than_days is not None:
+            clauses.append("created_at < ?")
+            params.append(time.time() - older_than_days * 24 * 3600)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM scores{where}", params).rowcount
+            self._conn.commit()
+        return removed
+
+    def export(self, path):
+        """Writes every entry to a CSV file and returns the number of rows written."""
+        rows = self._conn.execute(
+            "SELECT album, track_title, model, prompt_version, lyrics_hash, result FROM scores "
+            "ORDER BY album, track_title").fetchall()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['album', 'track_title', 'model', 'prompt_version', 'lyrics_hash'] + RESULT_COLUMNS)
+            for *meta, result in rows:
+                writer.writerow(meta + json.loads(result))
+        return len(rows)
+
+    def close(self):
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, prune or export the emotion score store.")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Path of the score store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("inspect", help="Show entry counts per model and prompt version.")
+    prune_parser = commands.add_parser("prune", help="Delete stale or selected entries.")
+    prune_parser.add_argument("--model", help="Only prune entries for this model.")
+    prune_parser.add_argument("--all", action="store_true",
+                              help="Also prune entries for the current prompt version.")
+    prune_parser.add_argument("--older-than-days", type=float, help="Only prune entries older than this.")
+    export_parser = commands.add_parser("export", help="Export every entry to CSV.")
+    export_parser.add_argument("output", help="CSV file to write.")
+    args = parser.parse_args()
+
+    store = ScoreStore(args.db)
+    if args.command == "inspect":
+        print(f"Current prompt version: {prompt_version()}")
+        for row in store.summary():
+            marker = "current" if row["current_prompt"] else "stale"
+            print(f"{row['model']:<24} {row['prompt_version']}  {row['entries']:>6} entries  "
+                  f"last scored {row['last_scored']}  ({marker})")
+    elif args.command == "prune":
+        removed = store.prune(model=args.model, stale_only=not args.all, older_than_days=args.older_than_days)
+        print(f"Removed {removed} entries.")
+    elif args.command == "export":
+        print(f"Exported {store.export(args.output)} entries to {args.output}.")
+    store.close()
@@ -0,0 +1,252 @@
+"""
+Persistent inverted index over the collected lyrics (the *.jsonl files main.py
+writes), for phrase search from Python or the dashboard
+(Streamlit-dashboard/lyrics_search.py reads it).
+
+Every lyric line is split into lowercase word tokens, numbered by position so that
+a phrase is a run of consecutive positions (a gap separates songs, so phrases
+never run from one song into the next). An index is a directory of segments plus
+index.json, which records the content hash of each JSONL file and the segment it
+lives in. A segment holds plain .npy arrays, which readers memory-map:
+
+- terms.npy, term_offsets.npy, positions.npy: the sorted vocabulary, and each
+  term's positions (terms[i] -> positions[term_offsets[i]:term_offsets[i + 1]]).
+- lines.bin, line_offsets.npy, line_token_starts.npy, line_song.npy: the UTF-8
+  text of each line, its first token position and its song.
+- song_artist.npy, song_album.npy, song_title.npy, song_source.npy, segment.json:
+  the songs and the JSONL files they came from.
+
+update_index only re-reads files whose contents changed, writing them to one new
+segment; once there are more than MAX_SEGMENTS, every file is merged into one.
+
+    python search_index.py Swimming.jsonl Circles.jsonl Balloonerism.jsonl --index lyrics_index
+    python search_index.py --benchmark 20000 --index /tmp/lyrics_index
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from cleaning import MISSING_LYRICS, SECTION_HEADER_PATTERN
+from manifest import read_jsonl, write_jsonl
+
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+INDEX_FILE = "index.json"
+MAX_SEGMENTS = 8
+
+
+def tokenize(text):
+    """Lowercase word tokens; apostrophes inside words are kept ("what's"), trailing ones dropped ("drownin'")."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def lyric_lines(lyrics):
+    """The non-empty lines of a song, without [Section] tags."""
+    lines = (line.strip() for line in lyrics.split("\n"))
+    return [line for line in lines if line and not SECTION_HEADER_PATTERN.match(line)]
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _save_strings(path, values):
+    # Fixed-width unicode so the array can be memory-mapped and binary searched
+    np.save(path, np.array(values, dtype=f"<U{max([len(value) for value in values] + [1])}"))
+
+
+def write_segment(segment_dir, sources):
+    """Writes one segment from `sources`, a list of (name, records) pairs; returns its song count."""
+    vocabulary, token_ids, positions = {}, [], []
+    line_text, line_token_starts, line_song = [], [], []
+    song_artist, song_album, song_title, song_source = [], [], [], []
+    position = 0
+    for source_id, (_, records) in enumerate(sources):
+        for record in records:
+            lyrics = record.get("lyrics")
+            if not isinstance(lyrics, str) or lyrics.strip() in MISSING_LYRICS:
+                continue
+            song = len(song_title)
+            song_artist.append(str(record.get("artist", "")))
+            song_album.append(str(record.get("album", "")))
+            song_title.append(str(record.get("track_title", "")))
+            song_source.append(source_id)
+            for line in lyric_lines(lyrics):
+                line_text.append(line.encode("utf-8"))
+                line_token_starts.append(position)
+                line_song.append(song)
+                for token in tokenize(line):
+                    token_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                    positions.append(position)
+                    position += 1
+            position += 1 # Gap between songs
+
+    if position >= 2 ** 31:
+        raise ValueError("segment too large for int32 positions; index fewer files at a time")
+    terms = sorted(vocabulary)
+    rank = np.empty(len(terms), dtype=np.int64)
+    rank[[vocabulary[term] for term in terms]] = np.arange(len(terms))
+    term_ids = rank[np.array(token_ids, dtype=np.int64)] if token_ids else np.empty(0, dtype=np.int64)
+    # A stable sort by term keeps each term's positions in increasing order
+    order = np.argsort(term_ids, kind="stable")
+    term_offsets = np.concatenate([[0], np.cumsum(np.bincount(term_ids, minlength=len(terms)))]).astype(np.int64)
+
+    os.makedirs(segment_dir)
+    _save_strings(os.path.join(segment_dir, "terms.npy"), terms)
+    np.save(os.path.join(segment_dir, "term_offsets.npy"), term_offsets)
+    np.save(os.path.join(segment_dir, "positions.npy"), np.array(positions, dtype=np.int32)[order])
+    with open(os.path.join(segment_dir, "lines.bin"), "wb") as f:
+        f.write(b"".join(line_text))
+    np.save(os.path.join(segment_dir, "line_offsets.npy"),
+            np.concatenate([[0], np.cumsum([len(text) for text in line_text], dtype=np.int64)]).astype(np.int64))
+    np.save(os.path.join(segment_dir, "line_token_starts.npy"), np.array(line_token_starts, dtype=np.int32))
+    np.save(os.path.join(segment_dir, "line_song.npy"), np.array(line_song, dtype=np.int32))
+    for name, values in [("song_artist", song_artist), ("song_album", song_album), ("song_title", song_title)]:
+        _save_strings(os.path.join(segment_dir, f"{name}.npy"), values)
+    np.save(os.path.join(segment_dir, "song_source.npy"), np.array(song_source, dtype=np.int32))
+    with open(os.path.join(segment_dir, "segment.json"), "w", encoding="utf-8") as f:
+        json.dump({"sources": [name for name, _ in sources]}, f, ensure_ascii=False, indent=2)
+    return len(song_title)
+
+
+def _source_path(index_dir, key):
+    # normpath, so "index/../Swimming.jsonl" resolves even before the index directory exists
+    return os.path.normpath(os.path.join(index_dir, key))
+
+
+def read_state(index_dir):
+    """The index's index.json: its segments, and for each JSONL file its hash and segment."""
+    path = os.path.join(index_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {"segments": [], "files": {}, "next_segment": 1}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_index(index_dir, paths):
+    """
+    Brings the index at `index_dir` up to date with the JSONL files in `paths`. New or
+    changed files go into one new segment, indexed files that were deleted are dropped,
+    and everything else is left as it is. Returns counts of indexed, dropped and
+    unchanged files and the number of segments.
+    """
+    state = read_state(index_dir)
+    files = state["files"]
+    # Files are keyed relative to the index, so an index and its JSONL files can be moved together
+    keys = {os.path.relpath(os.path.abspath(path), os.path.abspath(index_dir)).replace(os.sep, "/"): path
+            for path in paths}
+    dropped = [key for key in files if key not in keys and not os.path.exists(_source_path(index_dir, key))]
+    for key in dropped:
+        del files[key]
+
+    hashes = {key: file_hash(path) for key, path in keys.items()}
+    changed = [key for key in keys if files.get(key, {}).get("sha1") != hashes[key]]
+    unchanged = len(keys) - len(changed)
+
+    live_segments = {entry["segment"] for key, entry in files.items() if key not in changed}
+    if len(live_segments) + bool(changed) > MAX_SEGMENTS:
+        # Merge: re-index every file into a single segment
+        for key in files:
+            hashes.setdefault(key, file_hash(_source_path(index_dir, key)))
+        changed = sorted(set(files) | set(changed))
+        live_segments = set()
+
+    if changed:
+        segment = f"segment-{state['next_segment']:05d}"
+        state["next_segment"] += 1
+        sources = [(key, read_jsonl(_source_path(index_dir, key))) for key in changed]
+        os.makedirs(index_dir, exist_ok=True)
+        write_segment(os.path.join(index_dir, segment), sources)
+        for key in changed:
+            files[key] = {"sha1": hashes[key], "segment": segment}
+        live_segments.add(segment)
+
+    old_segments = [segment for segment in state["segments"] if segment not in live_segments]
+    state["segments"] = [segment for segment in state["segments"] if segment in live_segments]
+    state["segments"] += sorted(live_segments - set(state["segments"]))
+    if changed or dropped or old_segments:
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_path = os.path.join(index_dir, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(index_dir, INDEX_FILE))
+        # Readers that opened the old state keep their memory maps; new readers never see these
+        for segment in old_segments:
+            shutil.rmtree(os.path.join(index_dir, segment), ignore_errors=True)
+    return {"indexed": len(changed), "dropped": len(dropped), "unchanged": unchanged,
+            "segments": len(state["segments"])}
+
+
+def synthetic_catalog(directory, songs, songs_per_album=12, vocabulary=20000, seed=0):
+    """Writes JSONL album shards of Zipf-distributed words, like real lyrics, and returns their paths."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{rank}" for rank in range(vocabulary)])
+    cumulative = np.cumsum(1 / np.arange(1, vocabulary + 1))
+    paths = []
+    for album_start in range(0, songs, songs_per_album):
+        album = f"Album {album_start // songs_per_album}"
+        records = []
+        for track in range(album_start, min(album_start + songs_per_album, songs)):
+            lengths = rng.integers(5, 10, size=rng.integers(30, 60))
+            song_words = words[np.searchsorted(cumulative, rng.random(lengths.sum()) * cumulative[-1])]
+            line_ends = np.cumsum(lengths)
+            lines = [" ".join(song_words[end - length:end]) for end, length in zip(line_ends, lengths)]
+            records.append({"artist": "Synthetic", "album": album, "track_title": f"Track {track}",
+                            "lyrics": "[Verse 1]\n" + "\n".join(lines), "language": "en"})
+        path = os.path.join(directory, f"{album}.jsonl")
+        write_jsonl(path, records)
+        paths.append(path)
+    return paths
+
+
+def benchmark(songs, index_dir):
+    data_dir = tempfile.mkdtemp(prefix="lyrics-")
+    paths = synthetic_catalog(data_dir, songs)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    print(f"Synthetic catalog: {songs} songs in {len(paths)} album files")
+
+    start_time = time.perf_counter()
+    update_index(index_dir, paths)
+    elapsed = time.perf_counter() - start_time
+    print(f"full build     {elapsed:7.2f}s  {songs / elapsed:10,.0f} songs/s")
+
+    start_time = time.perf_counter()
+    update_index(index_dir, paths)
+    print(f"no-op update   {time.perf_counter() - start_time:7.2f}s")
+
+    records = read_jsonl(paths[0])
+    records[0]["lyrics"] += "\nA brand new line"
+    write_jsonl(paths[0], records)
+    start_time = time.perf_counter()
+    result = update_index(index_dir, paths)
+    print(f"one album edit {time.perf_counter() - start_time:7.2f}s  {result}")
+
+    size_mb = sum(os.path.getsize(os.path.join(folder, name))
+                  for folder, _, names in os.walk(index_dir) for name in names) / 1e6
+    print(f"Index: {size_mb:.1f} MB in {index_dir} (search it with Streamlit-dashboard/lyrics_search.py)")
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the lyrics search index from JSONL files.")
+    parser.add_argument("inputs", nargs="*", help="JSONL files from main.py.")
+    parser.add_argument("--index", default="lyrics_index", help="Index directory to create or update.")
+    parser.add_argument("--benchmark", type=int, metavar="SONGS",
+                        help="Build an index of a synthetic catalog and time full and incremental updates.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.index)
+    elif args.inputs:
+        result = update_index(args.index, args.inputs)
+        print(f"Indexed {result['indexed']} files, dropped {result['dropped']}, {result['unchanged']} unchanged "
+              f"({result['segments']} segments in {args.index}).")
+    else:
+        parser.error("give JSONL files or --benchmark")
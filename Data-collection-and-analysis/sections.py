@@ -0,0 +1,148 @@
+"""
+Section-level emotion timeline. Splits the raw JSONL lyrics on the [Verse]/[Chorus]
+headers that get_lyrics keeps, scores each section, and writes one row per section
+to a Parquet file the dashboard plots as emotion over song time.
+
+Everything streams: records are read, split, scored and written in batches, and
+identical sections (repeated choruses, shared hooks) are only scored once.
+
+    python sections.py Swimming.jsonl Circles.jsonl Balloonerism.jsonl \
+        --out ../Streamlit-dashboard/section_timeline.parquet
+"""
+import argparse
+import hashlib
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cleaning import MISSING_LYRICS, SECTION_HEADER_PATTERN
+from emotion_scoring import RESULT_COLUMNS, FakeBackend
+
+TIMELINE_SCHEMA = pa.schema([
+    ("artist", pa.dictionary(pa.int32(), pa.string())),
+    ("album", pa.dictionary(pa.int32(), pa.string())),
+    ("track_title", pa.dictionary(pa.int32(), pa.string())),
+    ("section_index", pa.int16()),
+    ("section", pa.dictionary(pa.int32(), pa.string())),
+    ("text_hash", pa.string()),
+] + [(column, pa.dictionary(pa.int32(), pa.string()) if "emotion" in column else pa.float32())
+     for column in RESULT_COLUMNS])
+
+
+def iter_records(paths):
+    """Yields the JSONL records of every file in `paths`, one line at a time."""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def split_sections(lyrics):
+    """Yields (section name, text) pairs; text before the first header is named "Intro"."""
+    headers = list(SECTION_HEADER_PATTERN.finditer(lyrics))
+    if not headers or headers[0].start() > 0:
+        end = headers[0].start() if headers else len(lyrics)
+        yield "Intro", lyrics[:end].strip()
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(lyrics)
+        yield header.group(1).strip(), lyrics[header.end():end].strip()
+
+
+def text_hash(text):
+    """Hash of the section text with case and whitespace normalized, used to deduplicate repeats."""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def iter_sections(records):
+    """Yields one dict per non-empty section of each record."""
+    for record in records:
+        lyrics = record.get('lyrics')
+        if not isinstance(lyrics, str) or lyrics.strip() in MISSING_LYRICS:
+            continue
+        index = 0
+        for name, text in split_sections(lyrics):
+            if not text:
+                continue
+            yield {'artist': record.get('artist'), 'album': record['album'], 'track_title': record['track_title'],
+                   'section_index': index, 'section': name, 'text': text, 'text_hash': text_hash(text)}
+            index += 1
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_sections(sections, score_batch, batch_size=256, stats=None):
+    """
+    Yields each section with RESULT_COLUMNS added. `score_batch(texts)` returns a
+    DataFrame of RESULT_COLUMNS for a list of texts; it is only called for section
+    texts not seen before, so repeated choruses cost nothing extra. Pass a dict as
+    `stats` to get the raw and unique section counts.
+    """
+    scored = {}
+    stats = stats if stats is not None else {}
+    stats.update(sections=0, unique=0)
+    for batch in _batches(sections, batch_size):
+        new = {}
+        for section in batch:
+            if section['text_hash'] not in scored:
+                new.setdefault(section['text_hash'], section['text'])
+        if new:
+            results = score_batch(list(new.values()))
+            for key, row in zip(new, results[RESULT_COLUMNS].itertuples(index=False)):
+                scored[key] = row
+        stats['sections'] += len(batch)
+        stats['unique'] += len(new)
+        for section in batch:
+            yield dict(section, **scored[section['text_hash']]._asdict())
+
+
+def write_timeline(rows, path, batch_size=1024):
+    """Streams scored section rows into a dictionary-encoded Parquet file; returns the row count."""
+    columns = [field.name for field in TIMELINE_SCHEMA]
+    count = 0
+    with pq.ParquetWriter(path, TIMELINE_SCHEMA, compression="zstd") as writer:
+        for batch in _batches(rows, batch_size):
+            table = pa.Table.from_pydict({column: [row[column] for row in batch] for column in columns})
+            writer.write_table(table.cast(TIMELINE_SCHEMA))
+            count += len(batch)
+    return count
+
+
+def backend_batch(backend, album=""):
+    """Adapts an emotion_scoring backend to the score_batch interface (one call per unique text)."""
+    return lambda texts: pd.DataFrame([backend.score(text, album) for text in texts], columns=RESULT_COLUMNS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score lyrics section by section into a Parquet timeline.")
+    parser.add_argument("inputs", nargs="+", help="JSONL lyrics files from main.py.")
+    parser.add_argument("--out", default="section_timeline.parquet", help="Parquet file to write.")
+    parser.add_argument("--scorer", choices=["local", "fake"], default="local",
+                        help="local: the TF-IDF model from local_scorer.py; fake: deterministic hashes.")
+    parser.add_argument("--train", help="Training CSV for the local scorer.")
+    args = parser.parse_args()
+
+    if args.scorer == "local":
+        from local_scorer import LocalEmotionScorer, DEFAULT_TRAINING_DATA
+
+        score_batch = LocalEmotionScorer().fit(pd.read_csv(args.train or DEFAULT_TRAINING_DATA)).predict
+    else:
+        score_batch = backend_batch(FakeBackend())
+
+    stats = {}
+    rows = score_sections(iter_sections(iter_records(args.inputs)), score_batch, stats=stats)
+    written = write_timeline(rows, args.out)
+    print(f"Wrote {written} sections to {args.out}; scored {stats['unique']} unique texts "
+          f"out of {stats['sections']} sections.")
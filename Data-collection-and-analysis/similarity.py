@@ -0,0 +1,246 @@
+"""
+Near-duplicate detection for lyrics. Remasters, deluxe editions and duplicate
+Genius hits carry slightly different lyrics, so drop_duplicates() and merges on
+track_title miss them, and each one costs an extra scoring call.
+
+Each song becomes the set of its 3-word shingles (after clean_lyrics, lowercased),
+summarized as a MinHash signature: NUM_PERM 32-bit minimums kept in one
+(songs x NUM_PERM) uint32 array. The share of equal positions in two signatures
+estimates the Jaccard similarity of the two songs. Locality-sensitive hashing
+(BANDS bands of 8 positions) only compares songs that share a whole band
+with another, so finding duplicates scales with the number of songs, not pairs.
+
+    python similarity.py Swimming.jsonl Circles.jsonl Balloonerism.jsonl
+    python similarity.py --benchmark 20000
+"""
+import argparse
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from cleaning import clean_lyrics
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 16 # Of 8 positions each; pairs above ~0.7 Jaccard almost always share a band
+DUPLICATE_THRESHOLD = 0.8
+SEED = 1
+
+# File next to the Parquet partitions written by storage.py; pyarrow skips names starting with '_'
+INDEX_FILENAME = '_similarity.npz'
+# Every position of an empty song's signature; empty songs match nothing
+EMPTY = np.iinfo(np.uint32).max
+
+
+class _Vocabulary(dict):
+    """Word -> CRC32, computed the first time each word is seen."""
+
+    def __missing__(self, word):
+        word_hash = self[word] = zlib.crc32(word.encode('utf-8'))
+        return word_hash
+
+
+def shingle_hashes(lyrics, size=SHINGLE_SIZE, vocabulary=None):
+    """Returns the distinct 64-bit hashes of the lyrics' `size`-word shingles."""
+    words = clean_lyrics(lyrics).lower().split() if isinstance(lyrics, str) else []
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    vocabulary = _Vocabulary() if vocabulary is None else vocabulary
+    word_hashes = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.uint64, count=len(words))
+    shingles = np.zeros(len(words) - size + 1, dtype=np.uint64)
+    for offset in range(size):
+        # Order-sensitive mix of the words' hashes (wraps around in 64 bits)
+        shingles = shingles * np.uint64(0x100000001B3) + word_hashes[offset:len(words) - size + 1 + offset]
+    return np.unique(shingles)
+
+
+def minhash_signatures(lyrics, num_perm=NUM_PERM, seed=SEED):
+    """
+    Returns a (len(lyrics), num_perm) uint32 array of MinHash signatures. Each
+    permutation is a multiply-add-shift hash applied to every song's shingles at once.
+    """
+    vocabulary = _Vocabulary()
+    shingle_sets = [shingle_hashes(text, vocabulary=vocabulary) for text in lyrics]
+    signatures = np.full((len(shingle_sets), num_perm), EMPTY, dtype=np.uint32)
+    has_shingles = np.array([len(shingles) > 0 for shingles in shingle_sets], dtype=bool)
+    if not has_shingles.any():
+        return signatures
+
+    shingles = np.concatenate([shingle_sets[i] for i in np.flatnonzero(has_shingles)])
+    starts = np.cumsum([0] + [len(shingle_sets[i]) for i in np.flatnonzero(has_shingles)])[:-1]
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    increments = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    for column in range(num_perm):
+        permuted = ((shingles * multipliers[column] + increments[column]) >> np.uint64(32)).astype(np.uint32)
+        signatures[has_shingles, column] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+class LyricsIndex:
+    """
+    MinHash signatures of a list of songs with an LSH lookup on top. Positions
+    refer to the order the songs were given in.
+    """
+
+    def __init__(self, signatures, bands=BANDS):
+        self.signatures = signatures
+        self.bands = bands
+        self.rows = signatures.shape[1] // bands
+
+    @classmethod
+    def build(cls, lyrics, num_perm=NUM_PERM, bands=BANDS, seed=SEED):
+        return cls(minhash_signatures(list(lyrics), num_perm=num_perm, seed=seed), bands=bands)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def candidate_pairs(self):
+        """Returns an (n, 2) array of the position pairs (i < j) that share at least one band."""
+        non_empty = np.flatnonzero(self.signatures[:, 0] != EMPTY)
+        pairs = []
+        for band in range(self.bands):
+            keys = np.ascontiguousarray(self.signatures[non_empty, band * self.rows:(band + 1) * self.rows])
+            keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * self.rows))).ravel()
+            _, bucket, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+            shared = sizes[bucket] > 1
+            if not shared.any():
+                continue
+            members = np.flatnonzero(shared)
+            members = members[np.argsort(bucket[members], kind='stable')]
+            boundaries = np.flatnonzero(np.diff(bucket[members])) + 1
+            for group in np.split(non_empty[members], boundaries):
+                first, second = np.triu_indices(len(group), k=1)
+                pairs.append(np.stack([group[first], group[second]], axis=1))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(pairs).astype(np.int64), axis=0)
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity between the songs at positions `first` and `second` (arrays allowed)."""
+        return (self.signatures[first] == self.signatures[second]).mean(axis=-1)
+
+    def near_duplicates(self, threshold=DUPLICATE_THRESHOLD):
+        """Returns (pairs, similarities) for the candidate pairs at or above `threshold`."""
+        pairs = self.candidate_pairs()
+        similarities = self.similarity(pairs[:, 0], pairs[:, 1]) if len(pairs) else np.empty(0)
+        keep = similarities >= threshold
+        return pairs[keep], similarities[keep]
+
+    def most_similar(self, position, top_k=5):
+        """Returns (positions, similarities) of the `top_k` songs most like the one at `position`."""
+        similarities = (self.signatures == self.signatures[position]).mean(axis=1)
+        similarities[position] = -1
+        if self.signatures[position, 0] == EMPTY:
+            similarities[:] = -1
+        order = np.argsort(-similarities, kind='stable')[:top_k]
+        order = order[similarities[order] > 0]
+        return order, similarities[order]
+
+    def save(self, path, **keys):
+        """Writes the signatures, plus any per-song arrays in `keys` (e.g. titles), to an .npz file."""
+        np.savez_compressed(path, signatures=self.signatures, bands=self.bands,
+                            **{name: np.asarray(values, dtype=str) for name, values in keys.items()})
+
+
+def duplicate_groups(pairs, size):
+    """Labels each of `size` positions with the smallest position in its group of near-duplicates."""
+    parent = np.arange(size)
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for first, second in pairs:
+        a, b = root(first), root(second)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    return np.array([root(i) for i in range(size)])
+
+
+def mark_near_duplicates(df, threshold=DUPLICATE_THRESHOLD, column='lyrics'):
+    """
+    Returns a copy of `df` with a 'duplicate_of' column: for a song whose lyrics nearly
+    match an earlier row, that row's track_title; empty for the first of each group.
+    """
+    index = LyricsIndex.build(df[column].tolist())
+    pairs, _ = index.near_duplicates(threshold)
+    groups = duplicate_groups(pairs, len(df))
+    titles = df['track_title'].to_numpy()
+    df = df.copy()
+    df['duplicate_of'] = pd.Series([titles[group] if group != i else None for i, group in enumerate(groups)],
+                                   index=df.index, dtype=object)
+    return df
+
+
+def drop_near_duplicates(df, threshold=DUPLICATE_THRESHOLD, column='lyrics'):
+    """Keeps the first of each group of songs with near-identical lyrics."""
+    marked = mark_near_duplicates(df, threshold, column)
+    return df[marked['duplicate_of'].isna()].copy()
+
+
+def _brute_force_pairs(index, threshold):
+    first, second = np.triu_indices(len(index), k=1)
+    similarities = index.similarity(first, second)
+    keep = similarities >= threshold
+    return np.stack([first[keep], second[keep]], axis=1)
+
+
+def benchmark(songs, seed=0):
+    from cleaning import synthetic_corpus
+
+    # Every tenth song gets a "remaster": the same lyrics with a couple of lines changed
+    corpus = synthetic_corpus(songs, seed=seed).tolist()
+    rng = np.random.default_rng(seed)
+    expected = set()
+    for i in range(0, songs - 1, 10):
+        lines = corpus[i].split("\n")
+        for line in rng.choice(len(lines), size=2, replace=False):
+            lines[line] = "remastered bonus line"
+        corpus[i + 1] = "\n".join(lines)
+        expected.add((i, i + 1))
+    print(f"Synthetic corpus: {songs} songs, {len(expected)} planted near-duplicates")
+
+    start_time = time.perf_counter()
+    index = LyricsIndex.build(corpus)
+    built = time.perf_counter()
+    pairs, _ = index.near_duplicates()
+    done = time.perf_counter()
+    found = set(map(tuple, pairs.tolist()))
+    print(f"signatures {built - start_time:7.2f}s  {songs / (built - start_time):10,.0f} songs/s")
+    print(f"LSH lookup {done - built:7.2f}s  {len(index.candidate_pairs())} candidate pairs")
+    print(f"Found {len(found & expected)} of {len(expected)} planted pairs, {len(found - expected)} others")
+
+    if songs <= 5000:
+        start_time = time.perf_counter()
+        brute_force = set(map(tuple, _brute_force_pairs(index, DUPLICATE_THRESHOLD).tolist()))
+        print(f"all pairs  {time.perf_counter() - start_time:7.2f}s  (LSH found {len(found & brute_force)} "
+              f"of its {len(brute_force)} pairs)")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find songs with near-identical lyrics.")
+    parser.add_argument("inputs", nargs="*", help="JSONL files from main.py or CSV files from the notebook.")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help="Estimated Jaccard similarity above which two songs are near-duplicates.")
+    parser.add_argument("--benchmark", type=int, metavar="SONGS",
+                        help="Time the index on a synthetic corpus with planted duplicates instead.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    elif args.inputs:
+        from storage import read_songs
+
+        songs = mark_near_duplicates(read_songs(args.inputs), args.threshold)
+        duplicates = songs[songs['duplicate_of'].notna()]
+        for _, song in duplicates.iterrows():
+            print(f"{song['album']} - {song['track_title']}  ~  {song['duplicate_of']}")
+        print(f"{len(duplicates)} of {len(songs)} songs are near-duplicates of an earlier one.")
+    else:
+        parser.error("give song files or --benchmark")
@@ -0,0 +1,103 @@
+"""
+Columnar storage for the songs table. Rows are written to a Parquet dataset with
+one artist=<name>/album=<name>/ directory per album, repeated strings (emotions,
+language) are dictionary encoded and come back as pandas categoricals, and readers
+can ask for only the columns they need, so loading scores never touches lyrics.
+When the table has lyrics, their MinHash signatures (similarity.py) are saved in
+the dataset as _similarity.npz for the dashboard's similar-songs lookup.
+
+    python storage.py ../Streamlit-dashboard/Analysed_data.csv --out ../Streamlit-dashboard/analysed_data
+    python storage.py Swimming.jsonl Circles.jsonl Balloonerism.jsonl --out lyrics_data
+"""
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from emotion_scoring import RESULT_COLUMNS
+from similarity import INDEX_FILENAME, LyricsIndex
+
+PARTITION_COLUMNS = ['artist', 'album']
+CATEGORICAL_COLUMNS = ['language', 'song_emotion_1', 'song_emotion_2', 'song_emotion_3']
+SCORE_COLUMNS = ['album', 'track_title'] + RESULT_COLUMNS
+
+# Position of each row in the table that was written; partitions are read back in
+# directory order, so this restores the original song order
+ORDER_COLUMN = 'track_index'
+
+
+def read_songs(paths):
+    """Reads and concatenates JSONL (main.py output) and CSV (notebook output) files."""
+    frames = [pd.read_json(path, lines=True) if path.endswith('.jsonl') else pd.read_csv(path) for path in paths]
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_dataset(df, root):
+    """
+    Replaces the dataset at `root` with `df`, partitioned by artist and album. The new dataset
+    is written next to the old one and swapped in with two renames (old aside, new in) before
+    the old one is deleted, so readers never see half of it; `root` is only missing between
+    the two renames.
+    """
+    df = df.copy()
+    df[ORDER_COLUMN] = np.arange(len(df), dtype=np.int32)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    tmp_root = f"{root.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    pq.write_to_dataset(table, tmp_root, partition_cols=PARTITION_COLUMNS,
+                        basename_template='part-{i}.parquet', compression='zstd')
+    if 'lyrics' in df:
+        # One signature per song in track_index order, with the keys the dashboard looks songs up by
+        keys = {column: df[column].astype(str) for column in ['artist', 'album', 'track_title']}
+        LyricsIndex.build(df['lyrics']).save(os.path.join(tmp_root, INDEX_FILENAME), **keys)
+    old_root = f"{root.rstrip(os.sep)}.old"
+    shutil.rmtree(old_root, ignore_errors=True)
+    if os.path.exists(root):
+        os.replace(root, old_root)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+    return len(df)
+
+
+def read_dataset(root, columns=None, artists=None, albums=None):
+    """
+    Loads the dataset at `root` in the order it was written. `columns` limits which
+    columns are read from disk; `artists` and `albums` limit which partitions are opened.
+    """
+    read_columns = None if columns is None else list(dict.fromkeys(columns + [ORDER_COLUMN]))
+    filters = [(column, 'in', list(values)) for column, values in zip(PARTITION_COLUMNS, (artists, albums)) if values]
+    df = pd.read_parquet(root, columns=read_columns, filters=filters or None)
+    df = df.sort_values(ORDER_COLUMN).reset_index(drop=True)
+    for column in PARTITION_COLUMNS:
+        if column in df:
+            # Partition names come back sorted; keep them in the order they were written
+            values = df[column].astype(str)
+            df[column] = pd.Categorical(values, categories=values.unique().tolist())
+    if columns is not None and ORDER_COLUMN not in columns:
+        df = df.drop(columns=[ORDER_COLUMN])
+    return df
+
+
+def read_scores(root, artists=None, albums=None):
+    """The album, title and emotion score columns only: what the dashboard plots."""
+    return read_dataset(root, columns=SCORE_COLUMNS, artists=artists, albums=albums)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert JSONL/CSV song files to a Parquet dataset partitioned by artist and album.")
+    parser.add_argument("inputs", nargs="+", help="JSONL files from main.py or CSV files from the notebook.")
+    parser.add_argument("--out", required=True, help="Dataset directory to (re)write.")
+    args = parser.parse_args()
+
+    songs = read_songs(args.inputs)
+    written = write_dataset(songs, args.out)
+    albums = len(songs.drop_duplicates(PARTITION_COLUMNS))
+    print(f"Wrote {written} songs in {albums} album partitions to {args.out}.")
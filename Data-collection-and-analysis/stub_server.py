@@ -0,0 +1,214 @@
+"""
+Local stand-in for the Spotify and Genius APIs, used to exercise main.py without
+credentials or network access. It serves a synthetic discography, can add latency
+to every response and answers every Nth request with a 429.
+
+    python stub_server.py --port 8765 --latency 0.05 --throttle-every 10
+
+    SPOTIFY_ACCOUNTS_URL=http://127.0.0.1:8765 \
+    SPOTIFY_API_URL=http://127.0.0.1:8765/v1 \
+    GENIUS_BASE_URL=http://127.0.0.1:8765 GENIUS_API_TOKEN=stub \
+    python main.py --album "Album 1" --workers 8
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ("swim", "circles", "ocean", "drown", "ladder", "self", "care", "blue", "sky",
+         "moon", "good", "news", "tired", "home", "light", "falling", "wave", "running",
+         "I'm", "don't", "what's", "yeah,", "oh", "right?", "world.")
+AD_LIBS = ("(yeah)", "(yeah, yeah)", "(oh-oh)", "(uh)", "(ayy!)")
+
+
+def fake_lyrics(rng, sections=4, lines=6):
+    """Builds Genius-style lyrics with [Section] headers, punctuation and (ad-libs)."""
+    names = ["Intro", "Verse 1", "Chorus", "Verse 2", "Chorus", "Bridge", "Outro"]
+    parts = []
+    for name in names[:sections]:
+        body = []
+        for _ in range(lines):
+            line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9)))
+            if rng.random() < 0.25:
+                line += " " + rng.choice(AD_LIBS)
+            body.append(line)
+        parts.append(f"[{name}]\n" + "\n".join(body))
+    return "\n\n".join(parts)
+
+
+def build_discography(artist="Mac Miller", albums=3, tracks=12, seed=0, prefix=""):
+    """
+    Returns {"artist": ..., "albums": {album_id: {"name": ..., "tracks": [{"id", "name", "lyrics"}]}}}.
+    Give each artist a different `prefix` when serving several, so IDs stay unique.
+    """
+    rng = random.Random(seed)
+    discography = {}
+    for a in range(albums):
+        album_id = f"{prefix}album{a + 1}"
+        discography[album_id] = {
+            "name": f"{prefix}Album {a + 1}",
+            "tracks": [{"id": f"{album_id}track{t + 1}",
+                        "name": f"{prefix}Song {a + 1}-{t + 1}",
+                        "lyrics": fake_lyrics(rng)}
+                       for t in range(tracks)],
+        }
+    return {"artist": artist, "albums": discography}
+
+
+def build_catalog(artists=1, albums=3, tracks=12, seed=0):
+    """N artists x M albums x K tracks, as a list of build_discography results."""
+    return [build_discography(f"Artist {i + 1}", albums, tracks, seed=seed + i, prefix=f"a{i + 1}-")
+            for i in range(artists)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes the handful of endpoints main.py and lyricsgenius call."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _throttled(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            count = server.request_count
+        if server.latency:
+            time.sleep(server.latency)
+        if server.throttle_every and count % server.throttle_every == 0:
+            self._send(429, {"error": "rate limited"}, headers={"Retry-After": "1"})
+            return True
+        return False
+
+    def do_POST(self):
+        if self._throttled():
+            return
+        if self.path == "/api/token":
+            self._send(200, {"access_token": "stub-token", "token_type": "Bearer", "expires_in": 3600})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_GET(self):
+        if self._throttled():
+            return
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        artists = self.server.artists
+
+        if url.path == "/v1/search":
+            # Exact name match when serving several artists; otherwise the first one, like a fuzzy search
+            name = query.get("q", "").lower()
+            artist_id = next((i for i, d in artists.items() if d["artist"].lower() == name), next(iter(artists)))
+            self._send(200, {"artists": {"items": [{"id": artist_id, "name": artists[artist_id]["artist"]}]}})
+        elif m := re.fullmatch(r"/v1/artists/([^/]+)/albums", url.path):
+            data = artists.get(m.group(1))
+            if data is None:
+                return self._send(404, {"error": "not found"})
+            items = [{"id": album_id, "name": album["name"]} for album_id, album in data["albums"].items()]
+            self._page(items, query)
+        elif m := re.fullmatch(r"/v1/albums/([^/]+)/tracks", url.path):
+            album = self.server.albums_by_id.get(m.group(1))
+            if album is None:
+                return self._send(404, {"error": "not found"})
+            self._page([{"id": t["id"], "name": t["name"]} for t in album["tracks"]], query)
+        elif url.path == "/api/search/multi":
+            track = self.server.tracks_by_term.get(query.get("q", "").lower())
+            hits = [{"index": "song", "type": "song", "result": self._song(track)}] if track else []
+            self._send(200, {"response": {"sections": [{"type": "song", "hits": hits}]}})
+        elif m := re.fullmatch(r"/songs/([^/]+)", url.path):
+            track = self.server.tracks_by_id.get(m.group(1))
+            if track is None:
+                return self._send(404, {"error": "not found"})
+            self._send(200, {"response": {"song": self._song(track)}})
+        elif m := re.fullmatch(r"/([^/]+)-lyrics", url.path):
+            track = self.server.tracks_by_id.get(m.group(1))
+            if track is None:
+                return self._send(404, b"not found", "text/html")
+            html = track["lyrics"].replace("\n", "<br/>")
+            page = ('<html><body><div class="Lyrics__Container-sc-1" data-lyrics-container="true">'
+                    f'{html}</div></body></html>')
+            self._send(200, page.encode("utf-8"), "text/html")
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _page(self, items, query):
+        """Mimics Spotify's limit/offset paging."""
+        limit = int(query.get("limit", 20))
+        offset = int(query.get("offset", 0))
+        page = items[offset:offset + limit]
+        more = offset + limit < len(items)
+        self._send(200, {"items": page, "total": len(items), "offset": offset, "limit": limit,
+                         "next": f"{self.path}&offset={offset + limit}" if more else None})
+
+    def _song(self, track):
+        """Builds a Genius song body with every field lyricsgenius' Song type reads."""
+        artist = track["artist"]
+        url = f"https://genius.com/{track['id']}-lyrics"
+        primary_artist = {"id": 1, "name": artist, "api_path": "/artists/1", "url": "https://genius.com/artists/1",
+                          "header_image_url": "", "image_url": "", "is_meme_verified": False,
+                          "is_verified": False}
+        return {"id": track["id"], "title": track["name"], "title_with_featured": track["name"],
+                "full_title": f"{track['name']} by {artist}", "primary_artist": primary_artist,
+                "lyrics_state": "complete", "path": f"/{track['id']}-lyrics", "url": url,
+                "api_path": f"/songs/{track['id']}", "stats": {}, "annotation_count": 0,
+                "header_image_thumbnail_url": "", "header_image_url": "", "lyrics_owner_id": 0,
+                "pyongs_count": 0, "song_art_image_thumbnail_url": "", "song_art_image_url": ""}
+
+def make_server(port=0, discography=None, latency=0.0, throttle_every=0):
+    """
+    Creates (but does not start) a stub server; port 0 picks a free port.
+    `discography` is one build_discography result or a list of them (see build_catalog).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    discographies = discography or build_discography()
+    if isinstance(discographies, dict):
+        discographies = [discographies]
+    server.artists = {f"artist{i + 1}": d for i, d in enumerate(discographies)}
+    server.latency = latency
+    server.throttle_every = throttle_every
+    server.request_count = 0
+    server.lock = threading.Lock()
+    server.albums_by_id = {album_id: album for d in discographies for album_id, album in d["albums"].items()}
+    tracks = [dict(t, artist=d["artist"]) for d in discographies
+              for album in d["albums"].values() for t in album["tracks"]]
+    server.tracks_by_id = {t["id"]: t for t in tracks}
+    server.tracks_by_term = {f"{t['name']} {t['artist']}".lower(): t for t in tracks}
+    return server
+
+
+def start_in_background(**kwargs):
+    """Starts a stub server on a daemon thread and returns (server, base_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Spotify/Genius stub server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--artists", type=int, default=1)
+    parser.add_argument("--albums", type=int, default=3)
+    parser.add_argument("--tracks", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response.")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with a 429.")
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.artists, args.albums, args.tracks) if args.artists > 1 else \
+        build_discography(albums=args.albums, tracks=args.tracks)
+    server = make_server(args.port, catalog, args.latency, args.throttle_every)
+    print(f"Stub Spotify/Genius server on http://127.0.0.1:{args.port}")
+    server.serve_forever()
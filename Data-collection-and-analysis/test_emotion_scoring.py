@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+import emotion_scoring
+from emotion_scoring import FakeBackend, score_songs
+from score_store import ScoreStore
+
+
+class CountingBackend(FakeBackend):
+    """FakeBackend that counts how many songs it was asked to score."""
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.calls = 0
+
+    def score(self, lyrics, album):
+        self.calls += 1
+        return super().score(lyrics, album)
+
+
+@pytest.fixture
+def songs():
+    return pd.DataFrame({'album': ['Album'] * 5, 'track_title': [f"Track {i}" for i in range(5)],
+                         'lyrics': [f"verse number {i} of the song" for i in range(5)]})
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.sqlite"))
+    yield store
+    store.close()
+
+
+def run(songs, model, checkpoint, store):
+    backend = CountingBackend(model)
+    score_songs(songs, backend, workers=1, rate=0, checkpoint=str(checkpoint), store=store)
+    return backend.calls
+
+
+def test_unchanged_rerun_is_answered_without_the_backend(songs, store, tmp_path):
+    checkpoint = tmp_path / "scores.jsonl"
+    assert run(songs, "model-a", checkpoint, store) == len(songs)
+    assert run(songs, "model-a", checkpoint, store) == 0
+
+
+def test_new_model_rescores_every_song(songs, store, tmp_path):
+    checkpoint = tmp_path / "scores.jsonl"
+    run(songs, "model-a", checkpoint, store)
+    assert run(songs, "model-b", checkpoint, store) == len(songs)
+
+
+def test_new_prompt_rescores_every_song(songs, store, tmp_path, monkeypatch):
+    checkpoint = tmp_path / "scores.jsonl"
+    run(songs, "model-a", checkpoint, store)
+    monkeypatch.setattr(emotion_scoring, 'PROMPT_TEMPLATE', emotion_scoring.PROMPT_TEMPLATE + "\nBe concise.")
+    assert run(songs, "model-a", checkpoint, store) == len(songs)
+
+
+def test_edited_lyrics_are_rescored(songs, store, tmp_path):
+    checkpoint = tmp_path / "scores.jsonl"
+    run(songs, "model-a", checkpoint, store)
+    songs.loc[0, 'lyrics'] = "an entirely new first verse"
+    assert run(songs, "model-a", checkpoint, store) == 1
+
+
+def test_resume_after_a_partial_checkpoint_line(songs, tmp_path):
+    checkpoint = tmp_path / "scores.jsonl"
+    run(songs.iloc[:2], "model-a", checkpoint, None)
+    with open(checkpoint, 'a', encoding='utf-8') as f:
+        f.write('{"album": "Album", "track_ti')
+    assert run(songs, "model-a", checkpoint, None) == len(songs) - 2
+    lines = checkpoint.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == len(songs) and all(line.endswith('}') for line in lines)
@@ -0,0 +1,50 @@
+"""
+Hand-written text for each album page: the opening quote, the story, the Spotify
+track to embed and the quotes and notes shown next to each chart. dashboard.py
+looks albums up here by name; albums without an entry just show their charts.
+"""
+
+ALBUM_STORIES = {
+    'Balloonerism': {
+        'quote': '> "Yeah, somebody died today / I saw his picture in the funny papers / Didn’t think anybody died on a Friday" - *Funny Papers* (Haunting in hindsight, Mac passed away on a friday)',
+        'story': """
+Balloonerism feels like Mac at the height of his chaos. It’s raw, messy, and almost uncomfortable in how honest it is. The whole album drips with drug-fueled haze, late-night paranoia, and that unfiltered sadness that doesn’t even try to hide. Written almost only in a week back in 2014, at the height of his drug use, the album shows fear and anxiety that isn’t present in Swimming or Circles. You can hear nostalgia and longing woven through the lyrics, this constant sense of looking back to a time when life felt lighter, before the drugs took over. There’s a sadness in how much he misses that version of himself, even as he drowns deeper in substances.
+
+At the same time, Mac’s creative peak is on full display. He was exploding in fame, experimenting with sound, and pushing boundaries, but underneath all that artistry sits a deep depression. Balloonerism is both brilliant and tragic, the voice of someone wildly imaginative, but also completely consumed by addiction. It’s Mac at his most genius and most broken at the same time.""",
+        'spotify_embed': "https://open.spotify.com/embed/track/1JtAIBbCgomz38qPBSJzCn?utm_source=generator&theme=0",
+        'polar_quote': '> "I gave my life to this shit, already killed myself" - *Do You Have a Destination*',
+        'heatmap_quote': '> "Me, I used to want to be a wizard, when did life get so serious?" - *Excelsior*',
+        'spotlight_quote': '> "You wonder when God will just listen and give you a break / And He says, ‘See, living and dying are one and the same‘ " - *Tomorrow Will Never Know*',
+    },
+    'Swimming': {
+        'quote': '> "And I was drownin\' but now I\'m swimmin\' Through stressful waters to relief." - *Come Back to Earth*',
+        'story': """A journey of learning to "swim" through depression
+
+Swimming to me feels like Mac trying to figure out how to keep moving through depression instead of just letting it drown him. Around then, he managed to stay sober for a few months, and you can kinda hear that fight in the music. It’s not about celebrating being clean, it’s about how hard it is to actually do it. Compared to Balloonerism, which was just heavy with sadness and grief, Swimming feels more complicated. There’s this deep melancholy, and also a lot of frustration, almost like he’s mad at the addiction and what it’s taken from him. But the big difference is he’s not just giving in anymore but he’s processing it, learning to “swim” through his depression to get to a better place. It’s less about finally being okay and more about proving to himself that he can keep going.
+
+'The ever-going motif throughout the album of self love being important, tracks supporting these theories are ‘Self Care’, ‘Ladders’ expressing the acceptance of his flaws, ‘What’s The Use’ showing how though his drug abuse is unhealthy, but it is something that he enjoys, and to shorten the list ‘Hurt Feelings’ in where he is put in a high throne looking down at the people that make part of his everyday life.' - *Genius*""",
+        'spotify_embed': "https://open.spotify.com/embed/track/01z2fBGB8Hl3Jd3zXe4IXR?utm_source=generator&theme=0",
+        'polar_quote': '> "I just need a way out of my head / I’ll do anything for a way out of my head" - *Come Back to Earth*',
+        'polar_note': "The dominance of *longing* and *melancholy* paints the album as a search for stability, but the presence of joy and calmness shows Mac still had hope and moments of clarity. It feels like the chart mirrors the idea of the album title: he’s swimming, not sinking. There’s struggle, but there’s also survival.",
+        'heatmap_quote': '> "You never told me being rich was so lonely\\ Nobody know me, oh well\\ Hard to complain from this five-star hotel" - *Small Worlds*',
+        'spotlight_quote': '> "Used to be feeling depressed/ Now that I\'m living and I\'m feeling obsessed" - *Hurt Feelings*',
+        'spotlight_note': "The decline in sadness across Swimming reflects a shift from sharp grief to a gentler, evolving melancholy and a sign of Mac’s attempt to stay positive, even though this journey ultimately loops back into the heavier reflections of Circles",
+    },
+    'Circles': {
+        'quote': '> "I just end up right at the start of the line, drawing circles." - *Circles*',
+        'story': """
+*Circles* was supposed to be the sister album of swimming. It feels like the other side of swimming where Mac stopped fighting and accepted his addiction. It’s way softer, more resigned and he’s tired. Tired of trying and showing the world he’s okay. A quiet acceptance that maybe the pain doesn’t go away, it just becomes a part of life. It’s reflective, almost meditative at times, but also heavy because you can sense he’s letting go of control. It’s not about beating depression, it’s about living inside it and trying to find peace within.
+
+"Circles" has metaphors for the cycle that he can't seem to break, "Good News” honestly shows Mac is aware of his situation while also feeling powerless to change it, “Hand Me Downs”  feels like one of the most intimate moments where Mac opens up about wanting love, stability, and someone to share life with despite his struggles.""",
+        'spotify_embed': "https://open.spotify.com/embed/track/4jXl6VtkFFKIt3ycUQc5LT?utm_source=generator",
+        'polar_quote': '> "Wake up to the moon/ haven’t seen the sun in a while but I heard that the sky is still blue" - *Good News*',
+        'heatmap_quote': '> "There\'s a whole lot more for me waiting on the other side\\ I\'m always wondering if it feel like summer" - *Good News*',
+        'spotlight_quote': '> "But what\'s new? You get used to the bullshit, the screws, they go missin\' \\ It\'s likely they might be, but...'
+                           'You remind me, '
+                           'Shit, I need to stay in line \\ You damn well are a great design" - *Hand me downs*',
+    },
+}
+
+SPOTIFY_EMBED = """
+<iframe data-testid="embed-iframe" style="border-radius:12px" src="{src}" width="50%" height="160" frameBorder="0" allowfullscreen="" allow="autoplay; clipboard-write; encrypted-media; fullscreen; picture-in-picture" loading="lazy"></iframe>
+"""
@@ -1,9 +1,13 @@
+import os
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import plotly.graph_objects as go # Already loaded by streamlit itself
 import streamlit.components.v1 as components
 
+from album_stories import ALBUM_STORIES, SPOTIFY_EMBED
+
+# pandas, numpy, plotly.express, query (pyarrow) and lyrics_search are imported inside
+# the functions that use them, so the title and intro are on screen before they load
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="Swimming in Circles",
@@ -12,11 +16,78 @@ st.set_page_config(
 )
 
 # --- Data Loading and Caching ---
+# Any artist=<name>/album=<name>/ dataset written by storage.py (or a CSV) can be served
+DATA_PATH = os.getenv('DASHBOARD_DATA', 'Streamlit-dashboard/analysed_data')
+# Phrase index kept up to date by main.py (or search_index.py); its index.json is replaced on every update
+SEARCH_INDEX_PATH = os.getenv('DASHBOARD_SEARCH_INDEX', 'Data-collection-and-analysis/lyrics_index')
+SEARCH_LIMIT = 50
+# Per-section scores written by Data-collection-and-analysis/sections.py
+TIMELINE_PATH = 'Streamlit-dashboard/section_timeline.parquet'
+
+def data_version(filepath):
+    """
+    Identifies the current contents of the data file (or dataset directory) from one stat
+    call, so a rerun costs the same however many partitions there are. Every cache below
+    takes it as an argument, so regenerated data is picked up: storage.write_dataset renames
+    a new dataset directory into place, which changes the root's inode and modification time.
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return 0
+    return (stat.st_ino, stat.st_mtime_ns)
+
+
+@st.cache_resource
+def load_dataset(filepath, version=None):
+    """The dataset directory's pyarrow Dataset, discovered (its partitions listed) once per version."""
+    from query import open_dataset
+
+    return open_dataset(filepath)
+
+
 @st.cache_data
-def load_data(filepath):
+def load_catalog(filepath, version=None):
+    """Artist -> album names, read from the dataset's partitions (or the CSV's columns)."""
+    import pandas as pd
+    from query import catalog
+
+    try:
+        if os.path.isdir(filepath):
+            return catalog(load_dataset(filepath, version))
+        songs = pd.read_csv(filepath, usecols=['artist', 'album']).drop_duplicates()
+        return songs.groupby('artist', sort=False)['album'].apply(list).to_dict()
+    except FileNotFoundError:
+        st.error(f"Error: '{filepath}' not found. Please make sure the file is in the correct directory.")
+        return None
+
+
+@st.cache_resource
+def load_table(filepath, version=None, artist=None):
+    """
+    The artist's score columns from a dataset directory as an Arrow table: the one scan
+    load_data and load_album_stats both build on. Arrow tables are immutable, so sharing
+    the cached table is safe.
+    """
+    from query import read_table
+
+    return read_table(load_dataset(filepath, version), artist=artist)
+
+
+@st.cache_data
+def load_data(filepath, version=None, artist=None):
+    import pandas as pd
+    from query import SCORE_COLUMNS, songs_frame
     
     try:
-        df = pd.read_csv(filepath)
+        if os.path.isdir(filepath):
+            # Dataset written by storage.py: only this artist's partitions and the score columns are read
+            df = songs_frame(load_table(filepath, version, artist))
+        else:
+            df = pd.read_csv(filepath, usecols=['artist'] + SCORE_COLUMNS)
+            if artist is not None:
+                df = df[df['artist'] == artist]
+            df = df[SCORE_COLUMNS].reset_index(drop=True)
         
         
         # Create a 'long' dataframe for bar chart and heatmap
@@ -42,6 +113,281 @@ def load_data(filepath):
         return None, None
 
 
+@st.cache_resource
+def load_album_stats(filepath, version=None, artist=None):
+    """
+    Precomputes every per-album number and table main() shows for one artist, once
+    per data file, so a rerun only looks them up. Cached as a resource (shared, not copied on each
+    rerun), so callers must treat the result as read-only.
+    """
+    from query import album_aggregates
+
+    df, long_df = load_data(filepath, version, artist)
+    if df is None or long_df is None:
+        return None
+
+    # Sums, counts and means are grouped by Arrow on the same scan load_data read; only
+    # the long rows the bar chart draws are kept per album from the pandas frame
+    scores = load_table(filepath, version, artist) if os.path.isdir(filepath) else df
+    aggregates = album_aggregates(scores)
+    per_album = {}
+    for album, album_data_long in long_df.groupby('album', sort=False, observed=True):
+        per_album[str(album)] = {'long': album_data_long, **aggregates[str(album)]}
+    return {'albums': list(per_album), 'per_album': per_album}
+
+
+@st.cache_data
+def load_emotion_index(filepath, version=None, artist=None):
+    """
+    Inverted index from each emotion to the songs it was picked for: their row
+    positions in the artist's wide dataframe and the emotion's score in each, plus
+    how many times each emotion was picked overall.
+    """
+    import numpy as np
+
+    df, long_df = load_data(filepath, version, artist)
+    if df is None or long_df is None:
+        return None
+
+    # melt stacks the three emotion slots, so long row i belongs to song i % len(df)
+    picks = long_df.assign(song=np.tile(np.arange(len(df)), 3))
+    # If a song lists an emotion twice, its earliest slot wins
+    picks = picks.drop_duplicates(['song', 'emotion'])
+    songs = {emotion: (group['song'].to_numpy(), group['score'].to_numpy())
+             for emotion, group in picks.groupby('emotion', sort=False)}
+    return {'songs': songs, 'counts': long_df['emotion'].value_counts()}
+
+
+@st.cache_resource
+def load_similarity_index(filepath, version=None):
+    """The dataset's MinHash signatures and song keys, or None if it has no similarity index."""
+    from query import load_similarity
+
+    return load_similarity(filepath) if os.path.isdir(filepath) else None
+
+
+@st.cache_data
+def similar_songs_table(filepath, version, artist, album, track_title):
+    """The songs closest to one track, formatted for the Similar Songs tab."""
+    from query import similar_songs
+
+    signatures, keys = load_similarity_index(filepath, version)
+    similar = similar_songs(signatures, keys, artist, album, track_title)
+    similar['similarity'] = (similar['similarity'] * 100).round().astype(int).astype(str) + '%'
+    return similar.rename(columns={'artist': 'Artist', 'album': 'Album', 'track_title': 'Song',
+                                   'similarity': 'Shared lyrics'})
+
+
+@st.cache_resource
+def open_lyrics_search(index_dir, version=None):
+    """The memory-mapped lyrics search index, or None if it hasn't been built."""
+    from lyrics_search import INDEX_FILE, LyricsSearch
+
+    if not os.path.exists(os.path.join(index_dir, INDEX_FILE)):
+        return None
+    return LyricsSearch(index_dir)
+
+
+@st.cache_data
+def lyrics_search_table(index_dir, index_version, filepath, version, artist, query):
+    """Lines of `artist`'s songs containing `query`, with each song's top emotion."""
+    import pandas as pd
+
+    matches = pd.DataFrame(open_lyrics_search(index_dir, index_version).search(query, limit=SEARCH_LIMIT, artist=artist),
+                           columns=['artist', 'album', 'track_title', 'line'])
+    # Choruses repeat, so the same line often matches several times in one song
+    matches = matches.drop_duplicates(['album', 'track_title', 'line'])
+    df, _ = load_data(filepath, version, artist)
+    if df is not None:
+        scores = df[['album', 'track_title', 'song_emotion_1', 'song_score_1']].astype({'album': str})
+        matches = matches.merge(scores.drop_duplicates(['album', 'track_title']), on=['album', 'track_title'], how='left')
+    return matches.drop(columns=['artist']).rename(columns={
+        'album': 'Album', 'track_title': 'Song', 'line': 'Lyrics', 'song_emotion_1': 'Top Emotion',
+        'song_score_1': 'Score'})
+
+
+@st.cache_data
+def load_timeline(filepath, version=None):
+    """Loads the per-section scores written by sections.py, reshaped long for plotting."""
+    import pandas as pd
+
+    if not os.path.exists(filepath):
+        return None
+    sections = pd.read_parquet(filepath, columns=['artist', 'album', 'track_title', 'section_index', 'section',
+                                                  'song_emotion_1', 'song_score_1', 'song_emotion_2',
+                                                  'song_score_2', 'song_emotion_3', 'song_score_3'])
+    sections['section_label'] = (sections['section_index'] + 1).astype(str) + '. ' + sections['section'].astype(str)
+    long_sections = pd.concat(
+        [sections[['artist', 'album', 'track_title', 'section_index', 'section_label']].assign(
+            emotion=sections[f'song_emotion_{n}'].astype(str), score=sections[f'song_score_{n}'])
+         for n in (1, 2, 3)],
+        ignore_index=True)
+    return long_sections.sort_values(['album', 'track_title', 'section_index'])
+
+
+@st.cache_data
+def timeline_track_titles(filepath, version, artist, album):
+    """The album's songs that have section scores, in timeline order."""
+    timeline_df = load_timeline(filepath, version)
+    if timeline_df is None:
+        return []
+    album_timeline = timeline_df[(timeline_df['artist'] == artist) & (timeline_df['album'] == album)]
+    return album_timeline['track_title'].unique().tolist()
+
+
+# --- Figure Caches ---
+# Figures are built once per (artist, album or emotion, data version) and shared across
+# reruns; charts over POINT_BUDGET bars are cut down or aggregated before plotting
+
+@st.cache_resource
+def bar_figure(filepath, version, artist, album):
+    import plotly.express as px
+    from query import top_tracks
+
+    album_data_long = top_tracks(load_album_stats(filepath, version, artist)['per_album'][album]['long'])
+    fig_bar = px.bar(
+        album_data_long,
+        x='track_title',
+        y='score',
+        color='emotion',
+        barmode='group',
+        title=f'Emotion Scores for Each Song in "{album}" - Bar chart',
+        labels={
+            'track_title': 'Song Title',
+            'score': 'Emotion Score',
+            'emotion': 'Emotion'
+        },
+        height=600
+    )
+    fig_bar.update_layout(
+        xaxis={'categoryorder':'total descending'},
+        legend_title_text='Emotions'
+    )
+    fig_bar.update_xaxes(tickangle=45)
+    return fig_bar
+
+
+@st.cache_resource
+def polar_figure(filepath, version, artist, album):
+    import plotly.express as px
+
+    emotion_intensity = load_album_stats(filepath, version, artist)['per_album'][album]['emotion_intensity']
+    fig_polar = px.bar_polar(
+        emotion_intensity,
+        r="score",
+        theta="emotion",
+        color="emotion",
+        title=f'Total Intensity for Each Emotion in "{album}" - Polar bar chart',
+        labels={'emotion': 'Emotion', 'score': 'Total Score'},
+        template="plotly_dark",
+        color_discrete_sequence=px.colors.sequential.Plasma_r
+    )
+    fig_polar.update_layout(height=700)
+    return fig_polar
+
+
+@st.cache_resource
+def heatmap_figure(filepath, version, artist, album):
+    from query import POINT_BUDGET
+
+    heatmap_pivot = load_album_stats(filepath, version, artist)['per_album'][album]['heatmap']
+    if len(heatmap_pivot) > POINT_BUDGET:
+        strongest = heatmap_pivot.sum(axis=1).nlargest(POINT_BUDGET).index
+        heatmap_pivot = heatmap_pivot[heatmap_pivot.index.isin(strongest)]
+    custom_purple_gradient = ['#EADADA', '#D59CC5', '#BE5CA9', '#4D3A4D']
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=heatmap_pivot.values,
+        x=heatmap_pivot.columns,
+        y=heatmap_pivot.index,
+        colorscale=custom_purple_gradient,
+        text=heatmap_pivot.values,
+        texttemplate="%{z:.2f}"
+    ))
+    fig_heatmap.update_layout(
+        title_text=f'Emotion Intensities for "{album}" - Heat map',
+        title_x=0,
+        height=750,
+        width=900 
+    )
+    return fig_heatmap
+
+
+@st.cache_resource
+def spotlight_figure(filepath, version, artist, emotion):
+    import numpy as np
+    import plotly.express as px
+    from query import downsample_spotlight
+
+    df, _ = load_data(filepath, version, artist)
+    # Songs without the emotion in their top 3 score 0
+    song_positions, song_scores = load_emotion_index(filepath, version, artist)['songs'][emotion]
+    scores = np.zeros(len(df))
+    scores[song_positions] = song_scores
+
+    # Create a temporary dataframe for plotting
+    spotlight_df = df[['track_title', 'album']].copy()
+    spotlight_df['score'] = scores
+    spotlight_df, level = downsample_spotlight(spotlight_df)
+
+    if level == 'album':
+        # Too many songs for one bar each: one bar per album with its mean score
+        fig_spotlight = px.bar(
+            spotlight_df,
+            x='album',
+            y='score',
+            hover_data=['songs'],
+            title=f'Mean Score for Emotion: "{emotion}" per Album',
+            labels={'album': 'Album', 'score': 'Mean Emotion Score', 'songs': 'Songs'}
+        )
+        fig_spotlight.update_layout(height=600)
+        fig_spotlight.update_xaxes(tickangle=90)
+        return fig_spotlight
+
+    # Create the bar chart
+    fig_spotlight = px.bar(
+        spotlight_df,
+        x='track_title',
+        y='score',
+        color='album', # Color bars by album for better visual grouping
+        title=f'Scores for Emotion: "{emotion}" Across All Songs',
+        labels={'track_title': 'Song Title', 'score': 'Emotion Score'}
+    )
+
+    # Add vertical lines to denote album changes
+    album_end_indices = df.groupby('album').size().cumsum().values - 0.5
+    for x_pos in album_end_indices[:-1]: # Exclude the last one
+        fig_spotlight.add_vline(
+            x=x_pos, 
+            line_width=2, 
+            line_dash="dash", 
+            line_color="grey"
+        )
+    
+    fig_spotlight.update_layout(height=600)
+    fig_spotlight.update_xaxes(tickangle=90)
+    return fig_spotlight
+
+
+@st.cache_resource
+def timeline_figure(filepath, version, artist, album, track):
+    import plotly.express as px
+
+    timeline_df = load_timeline(filepath, version)
+    track_timeline = timeline_df[(timeline_df['artist'] == artist) & (timeline_df['album'] == album) &
+                                 (timeline_df['track_title'] == track)]
+    fig_timeline = px.line(
+        track_timeline,
+        x='section_label',
+        y='score',
+        color='emotion',
+        markers=True,
+        title=f'Emotions Through "{track}"',
+        labels={'section_label': 'Section', 'score': 'Emotion Score', 'emotion': 'Emotion'}
+    )
+    fig_timeline.update_layout(height=500)
+    return fig_timeline
+
+
 def main():
     st.title("Swimming in Circles: Mac Miller's Emotional Evolution")
     
@@ -62,269 +408,154 @@ So, here are some results I got, after analysing lyrics in each song using Gemin
     st.divider()
 
 
-    df, long_df = load_data('Streamlit-dashboard/Analysed_data.csv')
+    version = data_version(DATA_PATH)
+    albums_by_artist = load_catalog(DATA_PATH, version)
 
-    if long_df is not None and df is not None:
+    if albums_by_artist:
         
-        # Sidebar for Album Selection 
+        # Sidebar for Artist and Album Selection 
         st.sidebar.header("Album Selection")
-        album_list = long_df['album'].unique()
+        artists = list(albums_by_artist)
+        selected_artist = artists[0]
+        if len(artists) > 1:
+            selected_artist = st.sidebar.selectbox("Choose an artist:", artists)
+        album_stats = load_album_stats(DATA_PATH, version, selected_artist)
         selected_album = st.sidebar.selectbox(
             "Choose an album to view:",
-            album_list
+            album_stats['albums']
         )
         
 
-        # Filter both dataframes for song scores
-        album_data_long = long_df[long_df['album'] == selected_album]
-        album_data_wide = df[df['album'] == selected_album].copy()
-        album_data_wide['total_score'] = album_data_wide['song_score_1'] + album_data_wide['song_score_2'] + album_data_wide['song_score_3']
-
-        
-        # Calculate summary metrics
-        most_frequent_emotion = album_data_long['emotion'].mode()[0]
-        most_intense_song = album_data_wide.loc[album_data_wide['total_score'].idxmax()]['track_title']
-        avg_intensity = album_data_long['score'].mean()
-        
-        
+        # Per-album summary metrics, precomputed in load_album_stats
+        stats = album_stats['per_album'][selected_album]
+        story = ALBUM_STORIES.get(selected_album, {})
         
 
         #Album story
-        
-        if selected_album == 'Balloonerism':
-            st.header(f"Album: *{selected_album}*")
-            st.info('> "Yeah, somebody died today / I saw his picture in the funny papers / Didn’t think anybody died on a Friday" - *Funny Papers* (Haunting in hindsight, Mac passed away on a friday)')
-            st.subheader(f"The Story")
-            st.markdown("""
-            Balloonerism feels like Mac at the height of his chaos. It’s raw, messy, and almost uncomfortable in how honest it is. The whole album drips with drug-fueled haze, late-night paranoia, and that unfiltered sadness that doesn’t even try to hide. Written almost only in a week back in 2014, at the height of his drug use, the album shows fear and anxiety that isn’t present in Swimming or Circles. You can hear nostalgia and longing woven through the lyrics, this constant sense of looking back to a time when life felt lighter, before the drugs took over. There’s a sadness in how much he misses that version of himself, even as he drowns deeper in substances.
-            
-            At the same time, Mac’s creative peak is on full display. He was exploding in fame, experimenting with sound, and pushing boundaries, but underneath all that artistry sits a deep depression. Balloonerism is both brilliant and tragic, the voice of someone wildly imaginative, but also completely consumed by addiction. It’s Mac at his most genius and most broken at the same time.""")
-            
-        elif selected_album == 'Swimming':
-            st.header(f"Album: *{selected_album}*")
-            st.info('> "And I was drownin\' but now I\'m swimmin\' Through stressful waters to relief." - *Come Back to Earth*')
-            st.subheader(f"The Story")
-            st.markdown("""A journey of learning to "swim" through depression
-            
-Swimming to me feels like Mac trying to figure out how to keep moving through depression instead of just letting it drown him. Around then, he managed to stay sober for a few months, and you can kinda hear that fight in the music. It’s not about celebrating being clean, it’s about how hard it is to actually do it. Compared to Balloonerism, which was just heavy with sadness and grief, Swimming feels more complicated. There’s this deep melancholy, and also a lot of frustration, almost like he’s mad at the addiction and what it’s taken from him. But the big difference is he’s not just giving in anymore but he’s processing it, learning to “swim” through his depression to get to a better place. It’s less about finally being okay and more about proving to himself that he can keep going.
-        
-'The ever-going motif throughout the album of self love being important, tracks supporting these theories are ‘Self Care’, ‘Ladders’ expressing the acceptance of his flaws, ‘What’s The Use’ showing how though his drug abuse is unhealthy, but it is something that he enjoys, and to shorten the list ‘Hurt Feelings’ in where he is put in a high throne looking down at the people that make part of his everyday life.' - *Genius*""")
-            
-        elif selected_album == 'Circles':
-            st.header(f"Album: *{selected_album}*")
-            st.info('> "I just end up right at the start of the line, drawing circles." - *Circles*')
-             
-           
+        st.header(f"Album: *{selected_album}*")
+        if 'quote' in story:
+            st.info(story['quote'])
+        if 'story' in story:
             st.subheader(f"The Story")
-            st.markdown("""
-            *Circles* was supposed to be the sister album of swimming. It feels like the other side of swimming where Mac stopped fighting and accepted his addiction. It’s way softer, more resigned and he’s tired. Tired of trying and showing the world he’s okay. A quiet acceptance that maybe the pain doesn’t go away, it just becomes a part of life. It’s reflective, almost meditative at times, but also heavy because you can sense he’s letting go of control. It’s not about beating depression, it’s about living inside it and trying to find peace within.
-            
-            "Circles" has metaphors for the cycle that he can't seem to break, "Good News” honestly shows Mac is aware of his situation while also feeling powerless to change it, “Hand Me Downs”  feels like one of the most intimate moments where Mac opens up about wanting love, stability, and someone to share life with despite his struggles.""")
-            
-           
+            st.markdown(story['story'])
         st.divider()
 
         
-        
-        
         # album stats
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Most Frequent Emotion", most_frequent_emotion)
+            st.metric("Most Frequent Emotion", stats['most_frequent_emotion'])
         with col2:
-            st.metric("Most Intense Song", most_intense_song)
+            st.metric("Most Intense Song", stats['most_intense_song'])
         with col3:
-            st.metric("Average Emotion Score", f"{avg_intensity:.2f}")
+            st.metric("Average Emotion Score", f"{stats['avg_intensity']:.2f}")
 
         # --- Song Player Section ---
-        if selected_album == 'Balloonerism':
-            embed_code = """
-               <iframe data-testid="embed-iframe" style="border-radius:12px" src="https://open.spotify.com/embed/track/1JtAIBbCgomz38qPBSJzCn?utm_source=generator&theme=0" width="50%" height="160" frameBorder="0" allowfullscreen="" allow="autoplay; clipboard-write; encrypted-media; fullscreen; picture-in-picture" loading="lazy"></iframe>
-               """
-        elif selected_album == 'Swimming':
-                embed_code = """
-                <iframe data-testid="embed-iframe" style="border-radius:12px" src="https://open.spotify.com/embed/track/01z2fBGB8Hl3Jd3zXe4IXR?utm_source=generator&theme=0" width="50%" height="160" frameBorder="0" allowfullscreen="" allow="autoplay; clipboard-write; encrypted-media; fullscreen; picture-in-picture" loading="lazy"></iframe>
-                """
-        
-        elif selected_album == 'Circles':
-                embed_code = """
-                <iframe data-testid="embed-iframe" style="border-radius:12px" src="https://open.spotify.com/embed/track/4jXl6VtkFFKIt3ycUQc5LT?utm_source=generator" width="50%" height="160" frameBorder="0" allowfullscreen="" allow="autoplay; clipboard-write; encrypted-media; fullscreen; picture-in-picture" loading="lazy"></iframe>
-                """
-        components.html(embed_code, height=160)
+        if 'spotify_embed' in story:
+            components.html(SPOTIFY_EMBED.format(src=story['spotify_embed']), height=160)
         st.divider()
 
-        # --- 1. Bar Chart Display ---
-        
-        fig_bar = px.bar(
-            album_data_long,
-            x='track_title',
-            y='score',
-            color='emotion',
-            barmode='group',
-            title=f'Emotion Scores for Each Song in "{selected_album}" - Bar chart',
-            labels={
-                'track_title': 'Song Title',
-                'score': 'Emotion Score',
-                'emotion': 'Emotion'
-            },
-            height=600
-        )
-        fig_bar.update_layout(
-            xaxis={'categoryorder':'total descending'},
-            legend_title_text='Emotions'
-        )
-        fig_bar.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_bar, use_container_width=True)
-
-        st.divider()
+        # --- Charts: only the open tab's figure is built (or fetched from the figure cache) ---
+        tab_names = ["Songs", "Emotion Intensity", "Heat Map", "Emotion Spotlight", "Similar Songs"]
+        has_timeline = os.path.exists(TIMELINE_PATH) # The timeline tab appears once sections.py has run
+        if has_timeline:
+            tab_names.append("Section Timeline")
+        tabs = st.tabs(tab_names, key='chart_tab', on_change='rerun')
+        bar_tab, polar_tab, heatmap_tab, spotlight_tab, similar_tab = tabs[:5]
 
-        if selected_album == 'Balloonerism':
-            st.info('> "I gave my life to this shit, already killed myself" - *Do You Have a Destination*')
-        elif selected_album == 'Swimming':
-            st.info('> "I just need a way out of my head / I’ll do anything for a way out of my head" - *Come Back to Earth*')
-        elif selected_album == 'Circles':
-            st.info('> "Wake up to the moon/ haven’t seen the sun in a while but I heard that the sky is still blue" - *Good News*')
+        # --- 1. Bar Chart Display ---
+        with bar_tab:
+            if bar_tab.open:
+                st.plotly_chart(bar_figure(DATA_PATH, version, selected_artist, selected_album), use_container_width=True)
 
         # --- 2. Polar Bar Chart for Total Intensity per Emotion ---
-        
-        emotion_intensity = album_data_long.groupby('emotion')['score'].sum().reset_index()
-
-        fig_polar = px.bar_polar(
-            emotion_intensity,
-            r="score",
-            theta="emotion",
-            color="emotion",
-            title=f'Total Intensity for Each Emotion in "{selected_album}" - Polar bar chart',
-            labels={'emotion': 'Emotion', 'score': 'Total Score'},
-            template="plotly_dark",
-            color_discrete_sequence=px.colors.sequential.Plasma_r
-        )
-        fig_polar.update_layout(height=700)
-        st.plotly_chart(fig_polar, use_container_width=True)
-
-        if selected_album == 'Swimming':
-            st.markdown("Note")
-            st.markdown("The dominance of *longing* and *melancholy* paints the album as a search for stability, but the presence of joy and calmness shows Mac still had hope and moments of clarity. It feels like the chart mirrors the idea of the album title: he’s swimming, not sinking. There’s struggle, but there’s also survival.")
-
-
-        st.divider()
-        if selected_album == 'Balloonerism':
-            st.info('> "Me, I used to want to be a wizard, when did life get so serious?" - *Excelsior*')
-        elif selected_album == 'Swimming':
-            st.info('> "You never told me being rich was so lonely\ Nobody know me, oh well\ Hard to complain from this five-star hotel" - *Small Worlds*')
-        elif selected_album == 'Circles':
-            st.info('> "There\'s a whole lot more for me waiting on the other side\ I\'m always wondering if it feel like summer" - *Good News*')
+        with polar_tab:
+            if polar_tab.open:
+                if 'polar_quote' in story:
+                    st.info(story['polar_quote'])
+                st.plotly_chart(polar_figure(DATA_PATH, version, selected_artist, selected_album), use_container_width=True)
+                if 'polar_note' in story:
+                    st.markdown("Note")
+                    st.markdown(story['polar_note'])
 
         # --- 3. Heatmap Display ---
-       
-        
-        all_emotions_ordered = sorted(long_df['emotion'].unique())
-        
-        heatmap_pivot = album_data_long.pivot_table(
-            index='track_title', 
-            columns='emotion', 
-            values='score'
-        ).fillna(0)
-
-        heatmap_pivot = heatmap_pivot.reindex(columns=all_emotions_ordered, fill_value=0)
-
-        
-        custom_purple_gradient = ['#EADADA', '#D59CC5', '#BE5CA9', '#4D3A4D']
-
-        
-        fig_heatmap = go.Figure(data=go.Heatmap(
-            z=heatmap_pivot.values,
-            x=heatmap_pivot.columns,
-            y=heatmap_pivot.index,
-            colorscale=custom_purple_gradient,
-            text=heatmap_pivot.values,
-            texttemplate="%{z:.2f}"
-        ))
-
-        fig_heatmap.update_layout(
-            title_text=f'Emotion Intensities for "{selected_album}" - Heat map',
-            title_x=0,
-            height=750,
-            width=900 
-        )
-        
-        st.plotly_chart(fig_heatmap)
+        with heatmap_tab:
+            if heatmap_tab.open:
+                if 'heatmap_quote' in story:
+                    st.info(story['heatmap_quote'])
+                st.plotly_chart(heatmap_figure(DATA_PATH, version, selected_artist, selected_album))
 
-        st.divider()
-
-        
-        if selected_album == 'Balloonerism':
-            st.info('> "You wonder when God will just listen and give you a break / And He says, ‘See, living and dying are one and the same‘ " - *Tomorrow Will Never Know*')
-        elif selected_album == 'Swimming':
-            st.info('> "Used to be feeling depressed/ Now that I\'m living and I\'m feeling obsessed" - *Hurt Feelings*')
-        elif selected_album == 'Circles':
-            st.info('> "But what\'s new? You get used to the bullshit, the screws, they go missin\' \ It\'s likely they might be, but...' \
-            'You remind me, ' \
-            'Shit, I need to stay in line \ You damn well are a great design" - *Hand me downs*')
-
-        st.divider()
         # --- 4. Emotion Spotlight Chart ---
-    
-        st.markdown("**Emotion Spotlight - Bar Plot**.")
-
-        
-        top_emotions_list = long_df['emotion'].value_counts().nlargest(10).index.tolist()
-        selected_emotion = st.selectbox(
-            "Select an emotion to spotlight:",
-            top_emotions_list
-        )
-
-        if selected_emotion:
-            
-            scores = []
-            for _, row in df.iterrows():
-                score = 0
-                if row['song_emotion_1'] == selected_emotion:
-                    score = row['song_score_1']
-                elif row['song_emotion_2'] == selected_emotion:
-                    score = row['song_score_2']
-                elif row['song_emotion_3'] == selected_emotion:
-                    score = row['song_score_3']
-                scores.append(score)
-
-            # Create a temporary dataframe for plotting
-            spotlight_df = df[['track_title', 'album']].copy()
-            spotlight_df['score'] = scores
-
-            # Create the bar chart
-            fig_spotlight = px.bar(
-                spotlight_df,
-                x='track_title',
-                y='score',
-                color='album', # Color bars by album for better visual grouping
-                title=f'Scores for Emotion: "{selected_emotion}" Across All Songs',
-                labels={'track_title': 'Song Title', 'score': 'Emotion Score'}
-            )
-
-            # Add vertical lines to denote album changes
-            album_end_indices = df.groupby('album').size().cumsum().values - 0.5
-            for x_pos in album_end_indices[:-1]: # Exclude the last one
-                fig_spotlight.add_vline(
-                    x=x_pos, 
-                    line_width=2, 
-                    line_dash="dash", 
-                    line_color="grey"
+        with spotlight_tab:
+            if spotlight_tab.open:
+                if 'spotlight_quote' in story:
+                    st.info(story['spotlight_quote'])
+                st.markdown("**Emotion Spotlight - Bar Plot**.")
+
+                emotion_index = load_emotion_index(DATA_PATH, version, selected_artist)
+                top_emotions_list = emotion_index['counts'].nlargest(10).index.tolist()
+                selected_emotion = st.selectbox(
+                    "Select an emotion to spotlight:",
+                    top_emotions_list
                 )
-            
-            fig_spotlight.update_layout(height=600)
-            fig_spotlight.update_xaxes(tickangle=90)
-
-            st.plotly_chart(fig_spotlight, use_container_width=True)
-
-        if selected_album == 'Balloonerism':
-            st.markdown("")
-        elif selected_album == 'Swimming':
-            st.markdown("The decline in sadness across Swimming reflects a shift from sharp grief to a gentler, evolving melancholy and a sign of Mac’s attempt to stay positive, even though this journey ultimately loops back into the heavier reflections of Circles")
-        elif selected_album == 'Circles':
-            st.markdown("")
+
+                if selected_emotion:
+                    st.plotly_chart(spotlight_figure(DATA_PATH, version, selected_artist, selected_emotion), use_container_width=True)
+
+                if 'spotlight_note' in story:
+                    st.markdown(story['spotlight_note'])
+
+        # --- 5. Similar Songs: nearest lyrics across the whole catalog ---
+        with similar_tab:
+            if similar_tab.open:
+                if load_similarity_index(DATA_PATH, version) is None:
+                    st.info("This dataset has no lyrics index. Rewrite it with storage.py to look up similar songs.")
+                else:
+                    selected_song = st.selectbox(
+                        "Find songs with lyrics like:",
+                        stats['long']['track_title'].unique().tolist()
+                    )
+                    similar = similar_songs_table(DATA_PATH, version, selected_artist, selected_album, selected_song)
+                    if similar.empty:
+                        st.markdown("No other song shares lyrics with this one.")
+                    else:
+                        st.dataframe(similar, hide_index=True, width='stretch')
+
+        # --- 6. Section Timeline: one song's emotions verse by verse ---
+        if has_timeline:
+            timeline_tab = tabs[5]
+            with timeline_tab:
+                if timeline_tab.open:
+                    timeline_version = data_version(TIMELINE_PATH)
+                    timeline_tracks = timeline_track_titles(TIMELINE_PATH, timeline_version, selected_artist, selected_album)
+                    if not timeline_tracks:
+                        st.markdown("No section scores for this album yet. Run sections.py on its lyrics.")
+                    else:
+                        st.markdown("**Emotion Timeline - Line chart**")
+                        selected_track = st.selectbox(
+                            "Select a song to follow section by section:",
+                            timeline_tracks
+                        )
+                        st.plotly_chart(timeline_figure(TIMELINE_PATH, timeline_version, selected_artist,
+                                                        selected_album, selected_track), width='stretch')
         
         st.divider()
 
+        # --- 7. Lyrics Search (shown once main.py or search_index.py has built the index) ---
+        index_version = data_version(os.path.join(SEARCH_INDEX_PATH, 'index.json'))
+        if open_lyrics_search(SEARCH_INDEX_PATH, index_version) is not None:
+            st.header("Search the Lyrics")
+            query = st.text_input("Find a line (words in order, case and punctuation ignored):",
+                                  placeholder="way out of my head")
+            if query.strip():
+                matches = lyrics_search_table(SEARCH_INDEX_PATH, index_version, DATA_PATH, version,
+                                              selected_artist, query)
+                if matches.empty:
+                    st.markdown(f"No {selected_artist} lyrics contain \"{query}\".")
+                else:
+                    st.dataframe(matches, hide_index=True, width='stretch')
+            st.divider()
+
         # --- Contact Information Section ---
         st.header("Connect With Me")
         st.markdown(
@@ -0,0 +1,171 @@
+"""
+Phrase search over the lyrics index written by Data-collection-and-analysis/search_index.py
+(see its docstring for the file layout). Every array is memory-mapped: opening an
+index reads only index.json and each segment's song list, and a lookup touches just
+the pages of the terms it asks for, so it stays fast however large the catalog is.
+
+    python lyrics_search.py ../Data-collection-and-analysis/lyrics_index "drawing circles"
+    python lyrics_search.py /tmp/lyrics_index --benchmark 1000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+# Must match search_index.py
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+INDEX_FILE = "index.json"
+# Candidate positions checked at a time, so a search can stop as soon as it has enough lines
+CHUNK_SIZE = 1024
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class _Segment:
+    def __init__(self, path, live_sources):
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.terms = load("terms")
+        self.term_offsets = load("term_offsets")
+        self.positions = load("positions")
+        self.line_offsets = load("line_offsets")
+        self.line_token_starts = load("line_token_starts")
+        self.line_song = load("line_song")
+        self.song_artist = load("song_artist")
+        self.song_album = load("song_album")
+        self.song_title = load("song_title")
+        self.lines = np.memmap(os.path.join(path, "lines.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "lines.bin")) else np.empty(0, dtype=np.uint8)
+        with open(os.path.join(path, "segment.json"), encoding="utf-8") as f:
+            sources = json.load(f)["sources"]
+        # Songs from files that were re-indexed into a newer segment are hidden
+        live_ids = [i for i, source in enumerate(sources) if source in live_sources]
+        self.song_live = np.isin(load("song_source"), live_ids)
+
+    def postings(self, term):
+        """The token positions of `term`, or None if the segment never uses it."""
+        i = np.searchsorted(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return None
+        return self.positions[self.term_offsets[i]:self.term_offsets[i + 1]]
+
+    def phrase_starts(self, tokens, chunk_size=CHUNK_SIZE):
+        """
+        Yields, in increasing order, batches of the positions where `tokens` occur
+        consecutively. Candidates come from the rarest token, a chunk at a time, and are
+        checked against the other tokens' positions by binary search.
+        """
+        postings = [self.postings(token) for token in tokens]
+        if not tokens or any(term_postings is None for term_postings in postings):
+            return
+        rarest = min(range(len(tokens)), key=lambda k: len(postings[k]))
+        for offset in range(0, len(postings[rarest]), chunk_size):
+            # Kept in the index's int32: searchsorted would copy a whole int32 list to compare int64 keys
+            starts = np.array(postings[rarest][offset:offset + chunk_size]) - np.int32(rarest)
+            for k, term_postings in enumerate(postings):
+                if k == rarest or not len(starts):
+                    continue
+                wanted = starts + np.int32(k)
+                found = np.minimum(np.searchsorted(term_postings, wanted), len(term_postings) - 1)
+                starts = starts[term_postings[found] == wanted]
+            if len(starts):
+                yield starts
+
+    def line(self, line):
+        return bytes(self.lines[self.line_offsets[line]:self.line_offsets[line + 1]]).decode("utf-8")
+
+    def line_of(self, positions):
+        return np.searchsorted(self.line_token_starts, positions, side="right") - 1
+
+
+class LyricsSearch:
+    """A read-only view of a lyrics index; reopen it to see later updates."""
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, INDEX_FILE), encoding="utf-8") as f:
+            state = json.load(f)
+        live = {}
+        for source, entry in state["files"].items():
+            live.setdefault(entry["segment"], set()).add(source)
+        self.segments = [_Segment(os.path.join(index_dir, segment), live.get(segment, set()))
+                         for segment in state["segments"]]
+
+    def search(self, query, limit=50, artist=None):
+        """
+        Lines containing `query` as a phrase (case and punctuation are ignored), in the
+        order the songs were indexed. Each match is a dict with the song's artist, album
+        and track_title and the matching `line`; a phrase that runs over a line break
+        returns both lines joined with " / ". Only `artist`'s songs if given.
+        """
+        tokens = tokenize(query)
+        matches = []
+        for segment in self.segments:
+            previous = -1
+            for starts in segment.phrase_starts(tokens):
+                first_lines = segment.line_of(starts).tolist()
+                last_lines = segment.line_of(starts + np.int32(len(tokens) - 1)).tolist()
+                for first, last in zip(first_lines, last_lines):
+                    if first == previous: # Starts are sorted, so repeats within a line are adjacent
+                        continue
+                    previous = first
+                    song = segment.line_song[first]
+                    if not segment.song_live[song] or (artist is not None and segment.song_artist[song] != artist):
+                        continue
+                    matches.append({"artist": str(segment.song_artist[song]), "album": str(segment.song_album[song]),
+                                    "track_title": str(segment.song_title[song]),
+                                    "line": " / ".join(segment.line(line) for line in range(first, last + 1))})
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+
+def benchmark(index_dir, queries, seed=0):
+    """Times phrase lookups for 1-4 word phrases taken from random lines of the index."""
+    start_time = time.perf_counter()
+    index = LyricsSearch(index_dir)
+    print(f"open           {(time.perf_counter() - start_time) * 1000:8.2f}ms")
+
+    rng = random.Random(seed)
+    segment = index.segments[0]
+    phrases = []
+    while len(phrases) < queries:
+        tokens = tokenize(segment.line(rng.randrange(len(segment.line_offsets) - 1)))
+        length = rng.randint(1, 4)
+        if len(tokens) >= length:
+            start = rng.randrange(len(tokens) - length + 1)
+            phrases.append(" ".join(tokens[start:start + length]))
+
+    timings = []
+    for phrase in phrases:
+        start_time = time.perf_counter()
+        found = index.search(phrase, limit=20)
+        timings.append(time.perf_counter() - start_time)
+        if not found:
+            raise AssertionError(f"'{phrase}' was taken from the index but not found")
+    timings = np.array(timings) * 1000
+    print(f"{queries} lookups  median {np.median(timings):.3f}ms  p95 {np.percentile(timings, 95):.3f}ms  "
+          f"max {timings.max():.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the lyrics index for a phrase.")
+    parser.add_argument("index", help="Index directory written by search_index.py.")
+    parser.add_argument("query", nargs="?", help="Words to look for, in order.")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--benchmark", type=int, metavar="QUERIES", help="Time random phrase lookups instead.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.index, args.benchmark)
+    elif args.query:
+        for match in LyricsSearch(args.index).search(args.query, limit=args.limit):
+            print(f"{match['album']} - {match['track_title']}: {match['line']}")
+    else:
+        parser.error("give a query or --benchmark")
@@ -0,0 +1,181 @@
+"""
+Queries the dashboard runs against the song dataset written by
+Data-collection-and-analysis/storage.py (artist=<name>/album=<name>/ Parquet
+partitions). Artist and album filters and column lists are pushed down to
+pyarrow.dataset, so a page only reads the partitions and columns it shows; the
+per-album sums, counts and means are computed by Arrow's group_by on that scan, and
+charts that would send more than POINT_BUDGET bars to the browser are aggregated
+here first. Similar songs are looked up in the MinHash signatures storage.py saves
+next to the partitions.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+SCORE_COLUMNS = ['album', 'track_title', 'song_emotion_1', 'song_score_1', 'song_emotion_2',
+                 'song_score_2', 'song_emotion_3', 'song_score_3']
+ORDER_COLUMN = 'track_index'
+
+# Most bars (or heatmap rows) a single chart sends to the browser
+POINT_BUDGET = 300
+
+# Written by Data-collection-and-analysis/similarity.py; every position of an empty song is EMPTY
+SIMILARITY_FILE = '_similarity.npz'
+EMPTY = np.iinfo(np.uint32).max
+KEY_COLUMNS = ['artist', 'album', 'track_title']
+# Below this, a match is mostly common phrases and MinHash noise (1/128 per coincidence)
+MIN_SIMILARITY = 0.05
+
+
+def open_dataset(path):
+    return ds.dataset(path, format='parquet', partitioning='hive')
+
+
+def _filter(artist=None, album=None):
+    expression = None
+    for column, value in (('artist', artist), ('album', album)):
+        if value is not None:
+            term = ds.field(column) == value
+            expression = term if expression is None else expression & term
+    return expression
+
+
+def catalog(dataset):
+    """Maps each artist to their albums, both in the order they were written."""
+    songs = dataset.to_table(columns=['artist', 'album', ORDER_COLUMN]).to_pandas()
+    songs = songs.sort_values(ORDER_COLUMN).drop_duplicates(['artist', 'album'])
+    albums = {}
+    for artist, album in zip(songs['artist'].astype(str), songs['album'].astype(str)):
+        albums.setdefault(artist, []).append(album)
+    return albums
+
+
+def read_table(dataset, columns=SCORE_COLUMNS, artist=None, album=None):
+    """Reads `columns` for the songs of one artist (and optionally one album) as an Arrow table, in written order."""
+    table = dataset.to_table(columns=list(dict.fromkeys(columns + [ORDER_COLUMN])), filter=_filter(artist, album))
+    return table.sort_by(ORDER_COLUMN).drop_columns([ORDER_COLUMN])
+
+
+def read_songs(dataset, columns=SCORE_COLUMNS, artist=None, album=None):
+    """Reads `columns` for the songs of one artist (and optionally one album), in written order."""
+    return songs_frame(read_table(dataset, columns, artist, album))
+
+
+def songs_frame(table):
+    """A read_table result as a DataFrame, with album as a categorical in written order."""
+    songs = table.to_pandas()
+    if 'album' in songs:
+        songs['album'] = pd.Categorical(songs['album'].astype(str), categories=songs['album'].astype(str).unique())
+    return songs.reset_index(drop=True)
+
+
+def album_aggregates(table):
+    """
+    Per-album numbers for the album page, grouped by Arrow rather than pandas.
+    `table` holds SCORE_COLUMNS for one artist in written order (an Arrow table from
+    read_table, or the rows of a CSV as a DataFrame). Returns {album: {...}} with the
+    most frequent emotion (ties go to the first alphabetically), the song with the
+    highest total score (the first one on a tie), the mean score, the score summed per
+    emotion and, for the heatmap, the mean score per track and emotion.
+    """
+    if isinstance(table, pd.DataFrame):
+        table = pa.Table.from_pandas(table[SCORE_COLUMNS], preserve_index=False)
+    album = pc.cast(table['album'], pa.string())
+    position = pa.array(np.arange(len(table)))
+
+    # One (album, track, emotion, score) row per emotion slot, like load_data's long frame
+    long = pa.concat_tables([
+        pa.table({'album': album, 'track_title': table['track_title'],
+                  'emotion': pc.cast(table[f'song_emotion_{n}'], pa.string()),
+                  'score': pc.cast(table[f'song_score_{n}'], pa.float64())})
+        for n in (1, 2, 3)])
+    per_emotion = (long.group_by(['album', 'emotion'])
+                   .aggregate([('score', 'sum', pc.ScalarAggregateOptions(min_count=0)), ('emotion', 'count')])
+                   .sort_by([('album', 'ascending'), ('emotion', 'ascending')]).to_pandas())
+    mean_score = long.group_by('album').aggregate([('score', 'mean')]).to_pandas()
+    per_cell = (long.group_by(['album', 'track_title', 'emotion'])
+                .aggregate([('score', 'mean')]).to_pandas())
+
+    songs = pa.table({'album': album, 'track_title': table['track_title'], 'position': position,
+                      'total': pc.add(pc.add(table['song_score_1'], table['song_score_2']), table['song_score_3'])})
+    top_song = (songs.filter(pc.is_valid(songs['total']))
+                .sort_by([('total', 'descending'), ('position', 'ascending')])
+                .group_by('album', use_threads=False).aggregate([('track_title', 'first')]).to_pandas())
+
+    emotions = sorted(per_emotion['emotion'].dropna().unique())
+    mean_score = dict(zip(mean_score['album'], mean_score['score_mean']))
+    top_song = dict(zip(top_song['album'], top_song['track_title_first']))
+    heatmaps = (per_cell.dropna(subset=['emotion'])
+                .pivot(index=['album', 'track_title'], columns='emotion', values='score_mean')
+                .reindex(columns=emotions).fillna(0))
+    stats = {}
+    for name, emotion_rows in per_emotion.dropna(subset=['emotion']).groupby('album', sort=False):
+        stats[name] = {
+            'most_frequent_emotion': emotion_rows['emotion'].iloc[emotion_rows['emotion_count'].argmax()],
+            'most_intense_song': top_song.get(name),
+            'avg_intensity': mean_score[name],
+            'emotion_intensity': emotion_rows[['emotion', 'score_sum']].rename(columns={'score_sum': 'score'}).reset_index(drop=True),
+            'heatmap': heatmaps.xs(name, level='album'),
+        }
+    return stats
+
+
+def top_tracks(album_data_long, budget=POINT_BUDGET):
+    """
+    Keeps the tracks with the highest total score so an album's long (track, emotion,
+    score) rows fit in `budget` bars; small albums are returned unchanged.
+    """
+    if len(album_data_long) <= budget:
+        return album_data_long
+    totals = album_data_long.groupby('track_title', observed=True)['score'].sum()
+    keep = totals.nlargest(max(1, budget // 3)).index
+    return album_data_long[album_data_long['track_title'].isin(keep)]
+
+
+def downsample_spotlight(spotlight_df, budget=POINT_BUDGET):
+    """
+    Returns (frame, level). Up to `budget` songs are plotted one bar each
+    (level 'track_title'); beyond that each album becomes one bar with its mean
+    score (level 'album'), keeping the `budget` highest albums if there are still
+    too many.
+    """
+    if len(spotlight_df) <= budget:
+        return spotlight_df, 'track_title'
+    albums = (spotlight_df.groupby('album', observed=True, sort=False)['score']
+              .agg(score='mean', songs='size').reset_index())
+    if len(albums) > budget:
+        albums = albums.nlargest(budget, 'score').sort_index()
+    return albums, 'album'
+
+
+def load_similarity(path):
+    """
+    Returns (signatures, keys) from the dataset's similarity index: one MinHash
+    signature per song and a frame of its artist, album and title. None when the
+    dataset has no index (a CSV, or a dataset written without lyrics).
+    """
+    index_path = os.path.join(path, SIMILARITY_FILE)
+    if not os.path.isfile(index_path):
+        return None
+    with np.load(index_path) as index:
+        return index['signatures'], pd.DataFrame({column: index[column] for column in KEY_COLUMNS})
+
+
+def similar_songs(signatures, keys, artist, album, track_title, top_k=5, min_similarity=MIN_SIMILARITY):
+    """
+    The `top_k` songs whose lyrics share the most 3-word phrases with the given song,
+    with 'similarity' as the estimated share (Jaccard) of phrases in common. Songs
+    below `min_similarity` are left out.
+    """
+    match = np.flatnonzero((keys['artist'] == artist) & (keys['album'] == album) & (keys['track_title'] == track_title))
+    if not len(match) or signatures[match[0], 0] == EMPTY:
+        return keys.iloc[:0].assign(similarity=[])
+    similarity = (signatures == signatures[match[0]]).mean(axis=1)
+    similarity[match[0]] = 0
+    order = np.argsort(-similarity, kind='stable')[:top_k]
+    order = order[similarity[order] >= min_similarity]
+    return keys.iloc[order].assign(similarity=similarity[order]).reset_index(drop=True)